@@ -14,6 +14,7 @@ class _Config:
     _url_base: Optional[str] = None
     _url_vpd: Optional[str] = None
     _api_key: Optional[str] = None
+    _disk_cache: bool = True
 
     @property
     def url_base(self) -> Optional[str]:
@@ -30,6 +31,11 @@ class _Config:
         """Returns the API key stored on the _Config instance"""
         return self._api_key
 
+    @property
+    def disk_cache(self) -> bool:
+        """Returns whether rarely-changing API responses are cached on disk"""
+        return self._disk_cache
+
     def set_url_base(self, url_base: str) -> None:
         """Sets the URL base for the API in the configuration"""
         self._url_base = url_base.rstrip("/")
@@ -42,5 +48,9 @@ class _Config:
         """Sets the API key in the configuration"""
         self._api_key = key
 
+    def set_disk_cache(self, enabled: bool) -> None:
+        """Enables or disables caching rarely-changing API responses on disk"""
+        self._disk_cache = enabled
+
 
 config: _Config = _Config()
@@ -1,14 +1,43 @@
-import urllib.request
-from typing import Any, Callable, Dict, Optional
+import hashlib
+import json
+import os
+import queue
+import shutil
+import threading
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import (
+    Any,
+    AsyncIterator,
+    BinaryIO,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Union,
+)
 
 import cachetools
 import requests  # type: ignore
+from cachetools.keys import hashkey
 from requests.adapters import HTTPAdapter  # type: ignore
 from urllib3.util.retry import Retry  # type: ignore
 
 from nedrex import config
 from nedrex.exceptions import ConfigError, NeDRexError
 
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+STREAM_CHUNK_SIZE = 1 << 20
+_ASYNC_CLIENT: "ContextVar[Optional[Any]]" = ContextVar("nedrex_async_client", default=None)
+
 # Start - code derived from https://findwork.dev/blog/advanced-usage-python-requests-timeouts-retries-hooks/
 DEFAULT_TIMEOUT = 120
 
@@ -32,12 +61,121 @@ class TimeoutHTTPAdapter(HTTPAdapter):  # type: ignore
 retry_strategy = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
 
 http = requests.Session()
-adapter = TimeoutHTTPAdapter(max_retries=retry_strategy)
+adapter = TimeoutHTTPAdapter(max_retries=retry_strategy, pool_maxsize=32)
 http.mount("https://", adapter)
 http.mount("http://", adapter)
 # End - code derived from https://findwork.dev/blog/advanced-usage-python-requests-timeouts-retries-hooks/
 
 
+@lru_cache(maxsize=1)
+def _build_auth_headers(api_key: Optional[str]) -> Mapping[str, Optional[str]]:
+    return MappingProxyType({"x-api-key": api_key})
+
+
+def auth_headers() -> Mapping[str, Optional[str]]:
+    """Returns the (read-only) headers used to authenticate with the API
+
+    The mapping is only rebuilt when the API key in the config changes, so it
+    can be passed to every request without allocating a new dictionary.
+    """
+    return _build_auth_headers(config.api_key)
+
+
+def async_http() -> Any:
+    """Creates an HTTP/2 capable async client
+
+    The client should be used as an async context manager, so that requests
+    issued concurrently within the block are multiplexed over one connection.
+    The API key is not set on the client, but sent with each request (see
+    `async_auth_headers`).
+    """
+    import httpx  # type: ignore  # pylint: disable=import-outside-toplevel
+
+    timeout = httpx.Timeout(5.0, read=DEFAULT_TIMEOUT)
+    limits = httpx.Limits(max_keepalive_connections=16, max_connections=32)
+    return httpx.AsyncClient(http2=True, timeout=timeout, limits=limits)
+
+
+def async_auth_headers() -> Dict[str, str]:
+    """Returns the headers used to authenticate requests made with the async client
+
+    Unlike requests, httpx does not accept a header set to None, so the header
+    is left out if no API key is set.
+    """
+    return {} if config.api_key is None else {"x-api-key": config.api_key}
+
+
+@asynccontextmanager
+async def async_session() -> AsyncIterator[Any]:
+    """Shares one async client between the async functions called within the block
+
+    Without a session, each async function call uses a client of its own. The
+    client is closed when the block exits.
+
+    Examples
+    --------
+    >>> async def fetch(collections):
+    ...     async with async_session():
+    ...         return await asyncio.gather(*(get_nodes_async(c, limit=10) for c in collections))
+    """
+    async with async_http() as client:
+        token = _ASYNC_CLIENT.set(client)
+        try:
+            yield client
+        finally:
+            _ASYNC_CLIENT.reset(token)
+
+
+class _SessionClient:  # pylint: disable=too-few-public-methods
+    def __init__(self, client: Any) -> None:
+        self.client = client
+
+    async def __aenter__(self) -> Any:
+        return self.client
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        pass
+
+
+def async_client() -> Any:
+    """Returns an async context manager for the client of the enclosing `async_session`
+
+    Outside of a session, a new client is used, which is closed on exit.
+    """
+    client = _ASYNC_CLIENT.get()
+    return async_http() if client is None else _SessionClient(client)
+
+
+def close_session() -> None:
+    """Closes the pooled connections held by the shared (sync) session
+
+    The session stays usable afterwards; new connections are opened as needed.
+    """
+    http.close()
+
+
+def dumps_json(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)  # type: ignore  # pylint: disable=no-member
+    return json.dumps(obj).encode()
+
+
+def loads_json(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)  # pylint: disable=no-member
+    return json.loads(data)
+
+
+def post_json(url: str, body: Any, headers: Optional[Mapping[str, Any]] = None) -> requests.Response:
+    """POSTs a JSON body, serialised with orjson if it is installed
+
+    This is noticeably faster than the `json=` argument to requests for large
+    bodies, such as long lists of seeds.
+    """
+    headers = {**(headers or {}), "Content-Type": "application/json"}
+    return http.post(url, data=dumps_json(body), headers=headers)
+
+
 def check_response(resp: requests.Response, return_type: str = "json") -> Any:
     if resp.status_code == 401:
         data = resp.json()
@@ -52,18 +190,90 @@ def check_response(resp: requests.Response, return_type: str = "json") -> Any:
         raise NeDRexError("not found")
 
     if return_type == "json":
-        data = resp.json()
+        data = loads_json(resp.content)
     elif return_type == "text":
         data = resp.text
+    elif return_type == "response":
+        data = resp
     else:
         raise NeDRexError(f"invalid value for return_type ({return_type!r}) in check_response")
     return data
 
 
-@cachetools.cached(cachetools.TTLCache(1, ttl=10))
+def cache_dir() -> Path:
+    """Returns the directory API responses are cached in, `$XDG_CACHE_HOME/nedrex` (by default, `~/.cache/nedrex`)"""
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "nedrex"
+
+
+def clear_disk_cache() -> None:
+    """Removes the API responses cached on disk"""
+    for cache_file in cache_dir().glob("*.json"):
+        try:
+            cache_file.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _read_disk_cache(cache_file: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with cache_file.open() as handle:
+            cached: Dict[str, Any] = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if "etag" not in cached or "payload" not in cached:
+        return None
+    return cached
+
+
+def _write_disk_cache(cache_file: Path, etag: str, payload: Any) -> None:
+    tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with tmp_file.open("w") as handle:
+            json.dump({"etag": etag, "payload": payload}, handle)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        # The cache is an optimisation only, so failing to write it is not an error.
+        pass
+
+
+def disk_cached_get(url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    """GETs a rarely-changing route, revalidating a copy cached on disk using its ETag
+
+    The copy is kept under `cache_dir()`, and can be removed with
+    `clear_disk_cache()`. Caching can be turned off with
+    `config.set_disk_cache(False)`, e.g., where the home directory is
+    read-only.
+    """
+    if not config.disk_cache:
+        return check_response(http.get(url, params=params, headers=auth_headers()))
+
+    key = repr((url, sorted((params or {}).items())))
+    cache_file = cache_dir() / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    headers = dict(auth_headers())
+    cached = _read_disk_cache(cache_file)
+    if cached is not None:
+        headers["If-None-Match"] = cached["etag"]
+
+    resp = http.get(url, params=params, headers=headers)
+    if resp.status_code == 304:
+        if cached is not None:
+            return cached["payload"]
+        # Not modified, but there is no copy to return (e.g., a cache in between revalidated it), so fetch it in full.
+        resp = http.get(url, params=params, headers={**auth_headers(), "Cache-Control": "no-cache"})
+
+    data = check_response(resp)
+    etag = resp.headers.get("ETag")
+    if etag:
+        _write_disk_cache(cache_file, etag, data)
+    return data
+
+
+@cachetools.cached(cachetools.LRUCache(maxsize=8), key=lambda: hashkey(config.url_base), lock=threading.Lock())
 def get_pagination_limit() -> Any:
     url = f"{config.url_base}/pagination_max"
-    return requests.get(url, headers={"x-api-key": config.api_key}).json()
+    return check_response(http.get(url, headers=auth_headers()))
 
 
 def check_pagination_limit(limit: Optional[int], upper_limit: int) -> None:
@@ -71,28 +281,84 @@ def check_pagination_limit(limit: Optional[int], upper_limit: int) -> None:
         raise NeDRexError(f"limit={limit:,} is too great (maximum is {upper_limit:,})")
 
 
-def download_file(url: str, target: str) -> None:
+def stream_to_file(resp: requests.Response, target: str) -> None:
+    resp.raw.decode_content = True
+    with open(target, "wb") as handle:
+        shutil.copyfileobj(resp.raw, handle, length=STREAM_CHUNK_SIZE)
+
+
+def pipelined_stream_to_file(resp: requests.Response, target: str, depth: int = 8) -> None:
+    # Disk writes happen on a separate thread, so they overlap with reads from the socket.
+    resp.raw.decode_content = True
+    chunks: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=depth)
+    errors: List[BaseException] = []
+
+    def writer(handle: BinaryIO) -> None:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                return
+            # After a failed write, keep draining the queue so the reader is never left blocked on put().
+            if errors:
+                continue
+            try:
+                handle.write(chunk)
+            except BaseException as exc:  # pylint: disable=broad-except
+                errors.append(exc)
+
+    with open(target, "wb") as handle:
+        thread = threading.Thread(target=writer, args=(handle,), daemon=True)
+        thread.start()
+        try:
+            while not errors:
+                chunk = resp.raw.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                chunks.put(chunk)
+        finally:
+            chunks.put(None)
+            thread.join()
+
+    if errors:
+        raise errors[0]
+
+
+def download_file(url: str, target: str, pipelined: bool = False) -> None:
     if not url.lower().startswith("http"):
         raise ValueError(f"{url!r} for download_file must be http(s)")
 
-    if config.api_key is not None:
-        opener = urllib.request.build_opener()
-        opener.addheaders = [("x-api-key", config.api_key)]
-        urllib.request.install_opener(opener)
+    with http.get(url, headers=auth_headers(), stream=True) as resp:
+        if resp.status_code == 404:
+            raise NeDRexError("not found")
+        if resp.status_code >= 400:
+            raise NeDRexError("unexpected failure")
 
-    try:
-        urllib.request.urlretrieve(url, target)  # nosec
-    except urllib.error.HTTPError as err:
-        if err.code == 404:
-            raise NeDRexError("not found") from err
-        raise NeDRexError("unexpected failure") from err
+        if pipelined:
+            pipelined_stream_to_file(resp, target)
+        else:
+            stream_to_file(resp, target)
 
 
 def check_status_factory(url_suffix: str) -> Callable[[str], Dict[str, Any]]:
+    prepared_cache: "cachetools.LRUCache[Any, Any]" = cachetools.LRUCache(maxsize=32)
+    lock = threading.Lock()
+
     def return_func(uid: str) -> Dict[str, Any]:
-        url = f"{config.url_base}{url_suffix}"
-        params = {"uid": uid}
-        resp = http.get(url, params=params, headers={"x-api-key": config.api_key})
+        key = (config.url_base, config.api_key, uid)
+        with lock:
+            cached = prepared_cache.get(key)
+
+        if cached is None:
+            url = f"{config.url_base}{url_suffix}"
+            request = requests.Request("GET", url, params=(("uid", uid),), headers=auth_headers())
+            prepared = http.prepare_request(request)
+            settings = http.merge_environment_settings(prepared.url, {}, None, None, None)
+            cached = (prepared, settings)
+            with lock:
+                prepared_cache[key] = cached
+
+        prepared, settings = cached
+        resp = http.send(prepared, **settings)
         result: Dict[str, Any] = check_response(resp)
         return result
 
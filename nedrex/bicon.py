@@ -14,6 +14,7 @@ from typing import Dict as _Dict
 from typing import Optional as _Optional
 
 from nedrex import config as _config
+from nedrex._common import auth_headers as _auth_headers
 from nedrex._common import check_response as _check_response
 from nedrex._common import download_file as _download_file
 from nedrex._common import http as _http
@@ -46,7 +47,7 @@ def bicon_request(expression_file: _IO[str], lg_min: int = 10, lg_max: int = 15,
     data = {"lg_min": lg_min, "lg_max": lg_max, "network": network}
 
     url = f"{_config.url_base}/bicon/submit"
-    resp = _http.post(url, data=data, files=files, headers={"x-api-key": _config.api_key})
+    resp = _http.post(url, data=data, files=files, headers=_auth_headers())
     result: str = _check_response(resp)
     return result
 
@@ -66,7 +67,7 @@ def check_bicon_status(uid: str) -> _Dict[str, _Any]:
         using the `status` key
     """
     url = f"{_config.url_base}/bicon/status"
-    resp = _http.get(url, params={"uid": uid}, headers={"x-api-key": _config.api_key})
+    resp = _http.get(url, params=(("uid", uid),), headers=_auth_headers())
     result: _Dict[str, _Any] = _check_response(resp)
     return result
 
@@ -12,9 +12,11 @@ from typing import List as _List
 from typing import Optional as _Optional
 
 from nedrex import config as _config
+from nedrex._common import auth_headers as _auth_headers
 from nedrex._common import check_response as _check_response
 from nedrex._common import check_status_factory as _check_status_factory
 from nedrex._common import http as _http
+from nedrex._common import post_json as _post_json
 
 __all__ = ["closeness_submit", "check_closeness_status", "download_closeness_results"]
 
@@ -52,7 +54,7 @@ def closeness_submit(
 
     body = {"seeds": seeds, "only_direct_drugs": only_direct_drugs, "only_approved_drugs": only_approved_drugs, "N": N}
 
-    resp = _http.post(url, json=body, headers={"x-api-key": _config.api_key})
+    resp = _post_json(url, body, headers=_auth_headers())
     result: str = _check_response(resp)
     return result
 
@@ -88,7 +90,7 @@ def download_closeness_results(uid: str) -> str:
         A string containing the closeness centrality results
     """
     url = f"{_config.url_base}/closeness/download"
-    params = {"uid": uid}
-    resp = _http.get(url, params=params, headers={"x-api-key": _config.api_key})
+    params = (("uid", uid),)
+    resp = _http.get(url, params=params, headers=_auth_headers())
     result: str = _check_response(resp, return_type="text")
     return result
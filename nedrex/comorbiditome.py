@@ -8,12 +8,14 @@ from typing import List as _List
 from typing import Literal
 from typing import Optional as _Optional
 from typing import Union as _Union
-from urllib.request import urlretrieve
 
 from nedrex import config as _config
+from nedrex._common import auth_headers as _auth_headers
 from nedrex._common import check_response as _check_response
 from nedrex._common import check_status_factory as _check_status_factory
+from nedrex._common import download_file as _download_file
 from nedrex._common import http as _http
+from nedrex._common import post_json as _post_json
 
 __all__ = [
     "map_icd10_to_mondo",
@@ -45,7 +47,7 @@ def map_icd10_to_mondo(disorders: _List[str]) -> _Dict[str, _List[str]]:
     url = f"{_config.url_base}/comorbiditome/icd10_to_mondo"
 
     params = {"icd10": disorders}
-    headers = {"x-api-key": _config.api_key}
+    headers = _auth_headers()
 
     response = _http.get(url, params=params, headers=headers)
     result: _Dict[str, _List[str]] = _check_response(response)
@@ -78,7 +80,7 @@ def map_mondo_to_icd10(
     url = f"{_config.url_base}/comorbiditome/mondo_to_icd10"
 
     params = {"mondo": disorders, "only_3char": only_3char, "exclude_3char": exclude_3char}
-    headers = {"x-api-key": _config.api_key}
+    headers = _auth_headers()
 
     response = _http.get(url, params=params, headers=headers)
     result: _Dict[str, _List[str]] = _check_response(response)
@@ -128,7 +130,7 @@ def get_icd10_associations(nodes: _List[str], edge_type: _EdgeTypes) -> _Dict[st
     url = f"{_config.url_base}/comorbiditome/get_icd10_associations"
 
     params = {"node": nodes, "edge_type": edge_type}
-    headers = {"x-api-key": _config.api_key}
+    headers = _auth_headers()
 
     response = _http.get(url, params=params, headers=headers)
     result: _Dict[str, _List[str]] = _check_response(response)
@@ -176,9 +178,9 @@ def submit_comorbiditome_build(
         "max_p_value": max_p_value,
         "min_p_value": min_p_value,
     }
-    headers = {"x-api-key": _config.api_key}
+    headers = _auth_headers()
 
-    response = _http.post(url, json=body, headers=headers)
+    response = _post_json(url, body, headers=headers)
     result: str = _check_response(response)
     return result
 
@@ -232,7 +234,7 @@ def download_comorbiditome_build(uid: str, fmt: _Formats, save_path: _Optional[s
     url = f"{_config.url_base}/comorbiditome/download_comorbiditome_build/" f"{uid}/{fmt}/{filename}"
 
     if save_path:
-        urlretrieve(url, save_path)  # nosec
+        _download_file(url, save_path)
         return None
 
     response = _http.get(url)
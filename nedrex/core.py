@@ -1,24 +1,37 @@
 """Module containing functions relating to the general routes in the NeDRex API
 
 This module contains functions that access the general routes, and also routes
-for obtaining API keys.
+for obtaining API keys. It also contains helpers for waiting on submitted jobs.
 """
 
+import asyncio as _asyncio
+import time as _time
 from typing import Any as _Any
+from typing import Callable as _Callable
 from typing import Dict as _Dict
 from typing import Generator as _Generator
+from typing import Iterator as _Iterator
 from typing import List as _List
 from typing import Optional as _Optional
+from typing import Tuple as _Tuple
 from typing import cast as _cast
 
 from nedrex import config as _config
+from nedrex._common import async_auth_headers as _async_auth_headers
+from nedrex._common import async_client as _async_client
+from nedrex._common import async_session as _async_session
+from nedrex._common import auth_headers as _auth_headers
 from nedrex._common import check_pagination_limit as _check_pagination_limit
 from nedrex._common import check_response as _check_response
+from nedrex._common import disk_cached_get as _disk_cached_get
 from nedrex._common import get_pagination_limit as _get_pagination_limit
 from nedrex._common import http as _http
+from nedrex._common import loads_json as _loads_json
 from nedrex._decorators import check_url_base as _check_url_base
 from nedrex.exceptions import NeDRexError as _NeDRexError
 
+async_session = _async_session
+
 
 def _check_type(coll_name: str, coll_type: str) -> bool:
     if coll_type == "edge":
@@ -34,6 +47,49 @@ def _check_type(coll_name: str, coll_type: str) -> bool:
     raise _NeDRexError(f"_check_type received invalid coll_type={coll_type!r}")
 
 
+_RECORD_FORMATS = ("json", "arrow", "pandas")
+_EDGE_FORMATS = _RECORD_FORMATS + ("numpy",)
+_ID_FORMATS = ("json", "arrow")
+
+
+def _check_record_format(as_: str, formats: _Tuple[str, ...] = _RECORD_FORMATS) -> None:
+    if as_ not in formats:
+        raise ValueError(f"invalid value for argument as_ ({as_!r}), should be {'|'.join(formats)}")
+
+
+def _convert_records(items: _List[_Dict[str, _Any]], as_: str) -> _Any:
+    if as_ == "arrow":
+        import pyarrow  # type: ignore  # pylint: disable=import-outside-toplevel
+
+        return pyarrow.Table.from_pylist(items)
+    if as_ == "pandas":
+        import pandas  # type: ignore  # pylint: disable=import-outside-toplevel
+
+        return pandas.DataFrame.from_records(items)
+    return items
+
+
+def _edges_to_numpy(items: _List[_Dict[str, _Any]], edge_type: str) -> _Any:
+    import numpy  # type: ignore  # pylint: disable=import-outside-toplevel
+
+    # Undirected edges are stored with memberOne/memberTwo, directed edges with sourceDomainId/targetDomainId. Without
+    # any edges to look at, the collection's attributes say which.
+    attributes = items[0] if items else get_collection_attributes(edge_type)
+    if "memberOne" in attributes:
+        fields = ("memberOne", "memberTwo", "type")
+    else:
+        fields = ("sourceDomainId", "targetDomainId", "type")
+
+    rows = [tuple(edge[field] for field in fields) for edge in items]
+    dtype = []
+    for field, column in zip(fields, zip(*rows) if rows else [()] * len(fields)):
+        if all(isinstance(value, str) for value in column):
+            dtype.append((field, f"U{max((len(value) for value in column), default=1)}"))
+        else:
+            dtype.append((field, "O"))
+    return numpy.array(rows, dtype=dtype)
+
+
 @_check_url_base
 def api_keys_active() -> bool:
     """Checks whether API keys are active for the instance of NeDRex set in the config
@@ -47,7 +103,7 @@ def api_keys_active() -> bool:
     response = _http.get(url)
     if response.status_code != 200:
         raise Exception("Unexpected non-200 status code")
-    active = _cast(bool, response.json())
+    active = _cast(bool, _loads_json(response.content))
     return active
 
 
@@ -99,8 +155,7 @@ def get_node_types() -> _List[str]:
         A list of node types in NeDRexDB
     """
     url: str = f"{_config.url_base}/list_node_collections"
-    response = _http.get(url, headers={"x-api-key": _config.api_key})
-    node_list = _cast(_List[str], _check_response(response))
+    node_list = _cast(_List[str], _disk_cached_get(url))
     return node_list
 
 
@@ -114,8 +169,7 @@ def get_edge_types() -> _List[str]:
         A list of edge types in NeDRexDB
     """
     url: str = f"{_config.url_base}/list_edge_collections"
-    response = _http.get(url, headers={"x-api-key": _config.api_key})
-    edge_list = _cast(_List[str], _check_response(response))
+    edge_list = _cast(_List[str], _disk_cached_get(url))
     return edge_list
 
 
@@ -170,35 +224,57 @@ def get_collection_attributes(coll_type: str, include_counts: bool = False) -> _
      'document_count': 204906}
     """
     url: str = f"{_config.url_base}/{coll_type}/attributes"
-    response = _http.get(url, headers={"x-api-key": _config.api_key}, params={"include_counts": include_counts})
-    attributes = _check_response(response)
+    attributes = _disk_cached_get(url, params={"include_counts": include_counts})
     return attributes
 
 
+def _iter_node_ids(resp: _Any) -> _Iterator[str]:
+    try:
+        import ijson  # type: ignore  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        yield from (i["primaryDomainId"] for i in _loads_json(resp.content))
+        return
+
+    resp.raw.decode_content = True
+    yield from ijson.items(resp.raw, "item.primaryDomainId")
+
+
 @_check_url_base
-def get_node_ids(coll_type: str) -> _Any:
+def get_node_ids(coll_type: str, as_: str = "json") -> _Any:
     """Returns a list of node identifiers in NeDRex for the given type
 
     Parameters
     ----------
     coll_type: str
         The node type to get IDs for
+    as_ : str, optional
+        The format to return the IDs in. The default, `json`, returns a
+        list of strings. `arrow` returns a `pyarrow.StringArray`, and
+        requires the optional pyarrow dependency. If the optional ijson
+        dependency is installed, the response is parsed as it is streamed.
 
     Returns
     -------
-    list[str]
+    list[str] | pyarrow.StringArray
         The list of available node IDs for the specificed node type
     """
+    _check_record_format(as_, _ID_FORMATS)
     _check_type(coll_type, "node")
 
     url: str = f"{_config.url_base}/{coll_type}/attributes/primaryDomainId/json"
 
-    resp = _http.get(url, headers={"x-api-key": _config.api_key})
-    data = _check_response(resp)
-    node_ids = [i["primaryDomainId"] for i in data]
+    with _http.get(url, headers=_auth_headers(), stream=True) as resp:
+        _check_response(resp, return_type="response")
+        if as_ == "arrow":
+            import pyarrow  # type: ignore  # pylint: disable=import-outside-toplevel
+
+            return pyarrow.array(_iter_node_ids(resp), type=pyarrow.string())
+
+        node_ids = list(_iter_node_ids(resp))
     return node_ids
 
 
+# pylint: disable=R0913
 @_check_url_base
 def get_nodes(
     node_type: str,
@@ -206,6 +282,7 @@ def get_nodes(
     node_ids: _Optional[_List[str]] = None,
     limit: _Optional[int] = None,
     offset: int = 0,
+    as_: str = "json",
 ) -> _Any:
     """Returns nodes in NeDRex of the given type
 
@@ -225,12 +302,18 @@ def get_nodes(
     offset : int, optional
         The number of records to skip before returning records. Default is
         0 (no records skipped).
+    as_ : str, optional
+        The format to return the nodes in. The default, `json`, returns a
+        list of dictionaries. `arrow` returns a `pyarrow.Table` and
+        `pandas` returns a `pandas.DataFrame`; these require the optional
+        pyarrow or pandas dependencies respectively.
 
     Returns
     -------
-    list[dict[str, Any]]
+    list[dict[str, Any]] | pyarrow.Table | pandas.DataFrame
         The nodes in NeDRex returned by the API.
     """
+    _check_record_format(as_)
     _check_type(node_type, "node")
 
     upper_limit = _get_pagination_limit()
@@ -238,12 +321,13 @@ def get_nodes(
 
     params = {"node_id": node_ids, "attribute": attributes, "offset": offset, "limit": limit}
 
-    resp = _http.get(
-        f"{_config.url_base}/{node_type}/attributes/json", params=params, headers={"x-api-key": _config.api_key}
-    )
+    resp = _http.get(f"{_config.url_base}/{node_type}/attributes/json", params=params, headers=_auth_headers())
 
     items = _check_response(resp)
-    return items
+    return _convert_records(items, as_)
+
+
+# pylint: enable=R0913
 
 
 @_check_url_base
@@ -281,9 +365,7 @@ def iter_nodes(
     offset = 0
     while True:
         params["offset"] = offset
-        resp = _http.get(
-            f"{_config.url_base}/{node_type}/attributes/json", params=params, headers={"x-api-key": _config.api_key}
-        )
+        resp = _http.get(f"{_config.url_base}/{node_type}/attributes/json", params=params, headers=_auth_headers())
 
         data = _check_response(resp)
         yield from data
@@ -293,8 +375,54 @@ def iter_nodes(
         offset += upper_limit
 
 
+# pylint: disable=R0913
+@_check_url_base
+async def get_nodes_async(
+    node_type: str,
+    attributes: _Optional[_List[str]] = None,
+    node_ids: _Optional[_List[str]] = None,
+    limit: _Optional[int] = None,
+    offset: int = 0,
+    as_: str = "json",
+) -> _Any:
+    """Asynchronous version of `get_nodes`, for fetching from many collections at once
+
+    Concurrent calls (e.g., with `asyncio.gather`) made within an
+    `async_session` share one client, so they are multiplexed over one HTTP/2
+    connection. This requires the optional httpx dependency. The parameters
+    and return value are as for `get_nodes`.
+
+    Examples
+    --------
+    >>> async def fetch(collections):
+    ...     async with async_session():
+    ...         return await asyncio.gather(*(get_nodes_async(c, limit=10) for c in collections))
+    >>> disorders, genes = asyncio.run(fetch(["disorder", "gene"]))
+    """
+    _check_record_format(as_)
+
+    loop = _asyncio.get_running_loop()
+    await loop.run_in_executor(None, _check_type, node_type, "node")
+    upper_limit = await loop.run_in_executor(None, _get_pagination_limit)
+    _check_pagination_limit(limit, upper_limit)
+
+    # Unlike requests, httpx sends parameters set to None (as empty values), so they are left out here.
+    params = {"node_id": node_ids, "attribute": attributes, "offset": offset, "limit": limit}
+    params = {key: value for key, value in params.items() if value is not None}
+
+    async with _async_client() as client:
+        url = f"{_config.url_base}/{node_type}/attributes/json"
+        resp = await client.get(url, params=params, headers=_async_auth_headers())
+
+    items = _check_response(resp)
+    return _convert_records(items, as_)
+
+
+# pylint: enable=R0913
+
+
 @_check_url_base
-def get_edges(edge_type: str, limit: _Optional[int] = None, offset: _Optional[int] = None) -> _Any:
+def get_edges(edge_type: str, limit: _Optional[int] = None, offset: _Optional[int] = None, as_: str = "json") -> _Any:
     """
     Returns edges in NeDRex of the given type
 
@@ -308,19 +436,30 @@ def get_edges(edge_type: str, limit: _Optional[int] = None, offset: _Optional[in
     offset : int, optional
         The number of records to skip before returning records. Default is
         0 (no records skipped).
+    as_ : str, optional
+        The format to return the edges in. The default, `json`, returns a
+        list of dictionaries. `arrow` and `pandas` return a
+        `pyarrow.Table` and `pandas.DataFrame` respectively. `numpy`
+        returns a structured array of the edge endpoints and type, with
+        fields named after the endpoint attributes (`memberOne` and
+        `memberTwo`, or `sourceDomainId` and `targetDomainId`). These
+        formats require the corresponding optional dependency.
 
     Returns
     -------
-    list[dict[str, Any]]
+    list[dict[str, Any]] | pyarrow.Table | pandas.DataFrame | numpy.ndarray
         The edges in NeDRex returned by the API.
     """
+    _check_record_format(as_, _EDGE_FORMATS)
     _check_type(edge_type, "edge")
 
     params = {"limit": limit, "offset": offset, "api_key": _config.api_key}
 
-    resp = _http.get(f"{_config.url_base}/{edge_type}/all", params=params, headers={"x-api-key": _config.api_key})
+    resp = _http.get(f"{_config.url_base}/{edge_type}/all", params=params, headers=_auth_headers())
     items = _check_response(resp)
-    return items
+    if as_ == "numpy":
+        return _edges_to_numpy(items, edge_type)
+    return _convert_records(items, as_)
 
 
 @_check_url_base
@@ -346,7 +485,7 @@ def iter_edges(edge_type: str) -> _Generator[_Dict[str, _Any], None, None]:
     offset = 0
     while True:
         params = {"offset": offset, "limit": upper_limit}
-        resp = _http.get(f"{_config.url_base}/{edge_type}/all", params=params, headers={"x-api-key": _config.api_key})
+        resp = _http.get(f"{_config.url_base}/{edge_type}/all", params=params, headers=_auth_headers())
         data = _check_response(resp)
 
         yield from data
@@ -354,3 +493,104 @@ def iter_edges(edge_type: str) -> _Generator[_Dict[str, _Any], None, None]:
         if len(data) < upper_limit:
             break
         offset += upper_limit
+
+
+def _next_wait(uid: str, delay: float, deadline: _Optional[float]) -> float:
+    if deadline is None:
+        return delay
+    remaining = deadline - _time.monotonic()
+    if remaining <= 0:
+        raise _NeDRexError(f"job {uid!r} did not finish before the timeout")
+    return min(delay, remaining)
+
+
+# pylint: disable=R0913
+def wait_for(
+    check_fn: _Callable[[str], _Dict[str, _Any]],
+    uid: str,
+    *,
+    terminal: _Tuple[str, ...] = ("completed", "failed"),
+    initial: float = 1.0,
+    factor: float = 1.5,
+    max_interval: float = 30.0,
+    timeout: _Optional[float] = None,
+) -> _Dict[str, _Any]:
+    """Polls the status of a submitted job until it finishes
+
+    The interval between polls starts at `initial` seconds and grows by
+    `factor` each time (up to `max_interval`), so that long-running jobs are
+    not polled needlessly often.
+
+    Parameters
+    ----------
+    check_fn : callable
+        The function used to check the status of the job, e.g.,
+        `check_kpm_status`.
+    uid : str
+        The unique ID of the job.
+    terminal : tuple[str, ...], optional
+        The statuses at which to stop waiting. The default is
+        ("completed", "failed").
+    initial : float, optional
+        The initial interval between polls, in seconds. The default is 1.0
+    factor : float, optional
+        The factor by which the interval grows after each poll. The default
+        is 1.5
+    max_interval : float, optional
+        The maximum interval between polls, in seconds. The default is 30.0
+    timeout : float, optional
+        The maximum time to wait, in seconds. The default, None, waits
+        indefinitely.
+
+    Returns
+    -------
+    dict[str, Any]
+        The details of the job, as returned by `check_fn`, once its status
+        is in `terminal`.
+
+    Examples
+    --------
+    >>> uid = kpm_submit(seeds, k=10)
+    >>> wait_for(check_kpm_status, uid)["status"]
+    'completed'
+    """
+    deadline = None if timeout is None else _time.monotonic() + timeout
+    delay = initial
+    while True:
+        details = check_fn(uid)
+        if details.get("status") in terminal:
+            return details
+
+        _time.sleep(_next_wait(uid, delay, deadline))
+        delay = min(delay * factor, max_interval)
+
+
+async def wait_for_async(
+    check_fn: _Callable[[str], _Dict[str, _Any]],
+    uid: str,
+    *,
+    terminal: _Tuple[str, ...] = ("completed", "failed"),
+    initial: float = 1.0,
+    factor: float = 1.5,
+    max_interval: float = 30.0,
+    timeout: _Optional[float] = None,
+) -> _Dict[str, _Any]:
+    """Polls the status of a submitted job until it finishes, without blocking the event loop
+
+    This behaves as `wait_for`, but runs `check_fn` in the default executor
+    and sleeps with `asyncio.sleep`, so that several jobs can be awaited
+    concurrently.
+    """
+    loop = _asyncio.get_running_loop()
+    deadline = None if timeout is None else _time.monotonic() + timeout
+    delay = initial
+    while True:
+        details = await loop.run_in_executor(None, check_fn, uid)
+        if details.get("status") in terminal:
+            return details
+
+        await _asyncio.sleep(_next_wait(uid, delay, deadline))
+        delay = min(delay * factor, max_interval)
+
+
+# pylint: enable=R0913
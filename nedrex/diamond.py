@@ -8,9 +8,11 @@ nodes with a high connectivity significance to the modules.
 from typing import List as _List
 
 from nedrex import config as _config
+from nedrex._common import auth_headers as _auth_headers
 from nedrex._common import check_response as _check_response
 from nedrex._common import check_status_factory as _check_status_factory
 from nedrex._common import http as _http
+from nedrex._common import post_json as _post_json
 
 __all__ = ["diamond_submit", "check_diamond_status", "download_diamond_results"]
 
@@ -49,7 +51,7 @@ def diamond_submit(
     url = f"{_config.url_base}/diamond/submit"
     body = {"seeds": seeds, "n": n, "alpha": alpha, "network": network, "edges": edges}
 
-    resp = _http.post(url, json=body, headers={"x-api-key": _config.api_key})
+    resp = _post_json(url, body, headers=_auth_headers())
     result: str = _check_response(resp)
     return result
 
@@ -85,7 +87,7 @@ def download_diamond_results(uid: str) -> str:
         A string containing the DIAMOnD results
     """
     url = f"{_config.url_base}/diamond/download"
-    params = {"uid": uid}
-    resp = _http.get(url, params=params, headers={"x-api-key": _config.api_key})
+    params = (("uid", uid),)
+    resp = _http.get(url, params=params, headers=_auth_headers())
     result: str = _check_response(resp, return_type="text")
     return result
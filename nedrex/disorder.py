@@ -1,14 +1,29 @@
 """Module containing python functions to access the disorder routes in the NeDRex API"""
 
+import asyncio as _asyncio
+import threading as _threading
+from collections import deque as _deque
+from concurrent.futures import Future as _Future
 from typing import Any as _Any
 from typing import Callable as _Callable
+from typing import Coroutine as _Coroutine
+from typing import Deque as _Deque
+from typing import Dict as _Dict
 from typing import List as _List
+from typing import Tuple as _Tuple
 from typing import Union as _Union
 
+from more_itertools import chunked as _chunked
+
 from nedrex import config as _config
+from nedrex._common import async_auth_headers as _async_auth_headers
+from nedrex._common import async_client as _async_client
+from nedrex._common import auth_headers as _auth_headers
 from nedrex._common import check_response as _check_response
 from nedrex._common import http as _http
 from nedrex._decorators import check_url_base as _check_url_base
+from nedrex.exceptions import ConfigError as _ConfigError
+from nedrex.exceptions import NeDRexError as _NeDRexError
 
 __all__ = [
     "search_by_icd10",
@@ -16,23 +31,199 @@ __all__ = [
     "get_disorder_ancestors",
     "get_disorder_parents",
     "get_disorder_children",
+    "get_disorder_hierarchy",
+    "search_by_icd10_async",
+    "get_disorder_descendants_async",
+    "get_disorder_ancestors_async",
+    "get_disorder_parents_async",
+    "get_disorder_children_async",
 ]
 
+_HIERARCHY_ROUTES = ("descendants", "ancestors", "parents", "children")
+
+
+class _CodeBatcher:  # pylint: disable=too-few-public-methods
+    """Coalesces concurrent lookups against a disorder route into shared requests
+
+    While a request to the route is in flight, codes submitted from other
+    threads are queued and then sent together in a single request, with the
+    response split back out per caller. A caller submitting when no request is
+    in flight sends its request straight away, so no latency is added.
+
+    Any waiting caller can send the next batch, and a caller stops sending as
+    soon as its own lookup is done. If a shared request is rejected (e.g., one
+    caller asked for an invalid code), each caller's codes are re-sent on their
+    own, so the error only reaches the caller that caused it.
+    """
+
+    def __init__(self, suffix: str, max_batch: int = 256) -> None:
+        self._suffix = suffix
+        self._max_batch = max_batch
+        self._cond = _threading.Condition()
+        self._pending: _Deque[_Tuple[_List[str], "_Future[_Dict[str, _Any]]"]] = _deque()
+        self._in_flight = False
+
+    def submit(self, codes: _List[str]) -> _Dict[str, _Any]:
+        future: "_Future[_Dict[str, _Any]]" = _Future()
+        with self._cond:
+            self._pending.append((codes, future))
+
+        while True:
+            with self._cond:
+                while not future.done() and self._in_flight:
+                    self._cond.wait()
+                if future.done():
+                    break
+                self._in_flight = True
+                batch = self._next_batch()
+
+            try:
+                self._send(batch)
+            finally:
+                with self._cond:
+                    self._in_flight = False
+                    self._cond.notify_all()
+
+        return future.result()
+
+    def _next_batch(self) -> _List[_Tuple[_List[str], "_Future[_Dict[str, _Any]]"]]:
+        # Called with the lock held. The caller's own lookup is pending, so the batch is never empty.
+        batch: _List[_Tuple[_List[str], "_Future[_Dict[str, _Any]]"]] = []
+        n_codes = 0
+        while self._pending and (not batch or n_codes + len(self._pending[0][0]) <= self._max_batch):
+            batch.append(self._pending.popleft())
+            n_codes += len(batch[-1][0])
+        return batch
+
+    def _request(self, codes: _List[str]) -> _Dict[str, _Any]:
+        params = tuple(("q", code) for code in dict.fromkeys(codes))
+        resp = _http.get(f"{_config.url_base}{self._suffix}", params=params, headers=_auth_headers())
+        return _check_response(resp)  # type: ignore
+
+    def _send(self, batch: _List[_Tuple[_List[str], "_Future[_Dict[str, _Any]]"]]) -> None:
+        try:
+            try:
+                result = self._request([code for codes, _ in batch for code in codes])
+            except _ConfigError as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+                return
+            except _NeDRexError as exc:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(exc)
+                    return
+                for item in batch:
+                    self._send([item])
+                return
+            except Exception as exc:  # pylint: disable=broad-except
+                for _, future in batch:
+                    future.set_exception(exc)
+                return
+
+            for codes, future in batch:
+                future.set_result({code: result[code] for code in codes if code in result})
+        finally:
+            # If sending was interrupted (e.g., by KeyboardInterrupt), the other callers are not left waiting forever.
+            for _, future in batch:
+                future.cancel()
+
+
+def _generate_route(path: str, batched: bool = False) -> _Callable[[_Union[str, _List[str]]], _Any]:
+    suffix = f"/disorder/{path}"
+    batcher = _CodeBatcher(suffix) if batched else None
 
-def _generate_route(path: str) -> _Callable[[_Union[str, _List[str]]], _Any]:
-    @_check_url_base
     def new_func(codes: _Union[str, _List[str]]) -> _Any:
+        if _config.url_base is None:
+            raise _ConfigError("API URL is not set in the config")
+
         if isinstance(codes, str):
             codes = [codes]
 
-        url = f"{_config.url_base}/disorder/{path}"
-        resp = _http.get(url, params={"q": codes}, headers={"x-api-key": _config.api_key})
+        # Results are keyed by MONDO ID, so only lookups of MONDO IDs can be split back out of a shared request.
+        if batcher is not None and all(code.startswith("mondo.") for code in codes):
+            return batcher.submit(codes)
+
+        url = f"{_config.url_base}{suffix}"
+        resp = _http.get(url, params=tuple(("q", code) for code in codes), headers=_auth_headers())
         items = _check_response(resp)
         return items
 
     return new_func
 
 
+def _merge_chunk_results(results: _List[_Any]) -> _Any:
+    if all(isinstance(result, dict) for result in results):
+        merged_dict: _Dict[str, _Any] = {}
+        for result in results:
+            merged_dict.update(result)
+        return merged_dict
+
+    # Different ICD-10 codes can map to the same disorder, so records are de-duplicated across chunks.
+    merged_list: _List[_Any] = []
+    seen = set()
+    for result in results:
+        for record in result:
+            key = record.get("primaryDomainId") if isinstance(record, dict) else None
+            if key is not None:
+                if key in seen:
+                    continue
+                seen.add(key)
+            merged_list.append(record)
+    return merged_list
+
+
+def _generate_async_route(path: str) -> _Callable[..., _Coroutine[_Any, _Any, _Any]]:
+    suffix = f"/disorder/{path}"
+
+    async def new_func(codes: _Union[str, _List[str]], chunk_size: int = 50, max_concurrency: int = 32) -> _Any:
+        if _config.url_base is None:
+            raise _ConfigError("API URL is not set in the config")
+
+        if isinstance(codes, str):
+            codes = [codes]
+
+        url = f"{_config.url_base}{suffix}"
+        chunks = list(_chunked(codes, chunk_size)) or [codes]
+        semaphore = _asyncio.Semaphore(max_concurrency)
+
+        headers = _async_auth_headers()
+
+        async with _async_client() as client:
+
+            async def fetch(chunk: _List[str]) -> _Any:
+                async with semaphore:
+                    resp = await client.get(url, params={"q": chunk}, headers=headers)
+                return _check_response(resp)
+
+            results = await _asyncio.gather(*(fetch(chunk) for chunk in chunks))
+
+        return _merge_chunk_results(results)
+
+    return new_func
+
+
+_ASYNC_DOC_TEMPLATE = """Asynchronous version of `{name}`, for looking up many codes at once
+
+    The codes are split into chunks of `chunk_size`, which are requested
+    concurrently (at most `max_concurrency` at a time) and the results merged.
+    This requires the optional httpx dependency.
+
+    Parameters
+    ----------
+    codes : str | list[str]
+        A code (or list of codes), as for `{name}`.
+    chunk_size : int, optional
+        The number of codes to request at once. The default is 50.
+    max_concurrency : int, optional
+        The maximum number of requests in flight at once. The default is 32.
+
+    Returns
+    -------
+    Any
+        The merged results, in the same form as returned by `{name}`.
+"""
+
+
 search_by_icd10 = _generate_route("get_by_icd10")
 search_by_icd10.__name__ = "search_by_icd10"
 search_by_icd10.__doc__ = """Obtains NeDRex disorder nodes by ICD-10 codes
@@ -48,7 +239,7 @@ search_by_icd10.__doc__ = """Obtains NeDRex disorder nodes by ICD-10 codes
         Disorder records from NeDRexDB
 """
 
-get_disorder_descendants = _generate_route("descendants")
+get_disorder_descendants = _generate_route("descendants", batched=True)
 get_disorder_descendants.__name__ = "get_disorder_descendants"
 get_disorder_descendants.__doc__ = """Returns the ID(s) of nodes that are descentants of the input ID(s)
 
@@ -90,7 +281,7 @@ get_disorder_descendants.__doc__ = """Returns the ID(s) of nodes that are descen
      'mondo.0033925']}
 """
 
-get_disorder_ancestors = _generate_route("ancestors")
+get_disorder_ancestors = _generate_route("ancestors", batched=True)
 get_disorder_ancestors.__name__ = "get_disorder_ancestors"
 get_disorder_ancestors.__doc__ = """Returns the ID(s) of nodes that are ancestors of the input ID(s)
 
@@ -113,7 +304,7 @@ get_disorder_ancestors.__doc__ = """Returns the ID(s) of nodes that are ancestor
     {'mondo.0004425': ['mondo.0000001', 'mondo.0003240', 'mondo.0005151']}
 """
 
-get_disorder_parents = _generate_route("parents")
+get_disorder_parents = _generate_route("parents", batched=True)
 get_disorder_parents.__name__ = "get_disorder_parents"
 get_disorder_parents.__doc__ = """Returns the ID(s) of nodes that are parents of the input ID(s)
 
@@ -137,7 +328,7 @@ get_disorder_parents.__doc__ = """Returns the ID(s) of nodes that are parents of
 
 """
 
-get_disorder_children = _generate_route("children")
+get_disorder_children = _generate_route("children", batched=True)
 get_disorder_children.__name__ = "get_disorder_children"
 get_disorder_children.__doc__ = """Returns the ID(s) of nodes that are children of the input ID(s)
 
@@ -166,3 +357,65 @@ get_disorder_children.__doc__ = """Returns the ID(s) of nodes that are children
      'mondo.0012203',
      'mondo.0014448']}
 """
+
+
+@_check_url_base
+async def get_disorder_hierarchy(codes: _Union[str, _List[str]]) -> _Dict[str, _Any]:
+    """Returns the descendants, ancestors, parents and children of the input ID(s)
+
+    The four routes are requested concurrently from a single async client,
+    so that (where the server supports HTTP/2) the requests are multiplexed
+    over one connection. This requires the optional httpx dependency.
+
+    Parameters
+    ----------
+    codes : str | list[str]
+        A disorder ID (or list of disorder IDs) to get the hierarchy of.
+        Note that this can be in any valid namespace (e.g., mesh.D006980).
+
+    Returns
+    -------
+    dict[str, dict[str, list[str]]]
+        A dictionary with the keys `descendants`, `ancestors`, `parents`
+        and `children`, each mapping to the result of the corresponding
+        get_disorder_* function.
+
+    Examples
+    --------
+    >>> asyncio.run(get_disorder_hierarchy("mesh.D006980"))["parents"]
+    {'mondo.0004425': ['mondo.0003240']}
+    """
+    if isinstance(codes, str):
+        codes = [codes]
+
+    headers = _async_auth_headers()
+    async with _async_client() as client:
+        responses = await _asyncio.gather(
+            *(
+                client.get(f"{_config.url_base}/disorder/{route}", params={"q": codes}, headers=headers)
+                for route in _HIERARCHY_ROUTES
+            )
+        )
+
+    return {route: _check_response(resp) for route, resp in zip(_HIERARCHY_ROUTES, responses)}
+
+
+search_by_icd10_async = _generate_async_route("get_by_icd10")
+search_by_icd10_async.__name__ = "search_by_icd10_async"
+search_by_icd10_async.__doc__ = _ASYNC_DOC_TEMPLATE.format(name="search_by_icd10")
+
+get_disorder_descendants_async = _generate_async_route("descendants")
+get_disorder_descendants_async.__name__ = "get_disorder_descendants_async"
+get_disorder_descendants_async.__doc__ = _ASYNC_DOC_TEMPLATE.format(name="get_disorder_descendants")
+
+get_disorder_ancestors_async = _generate_async_route("ancestors")
+get_disorder_ancestors_async.__name__ = "get_disorder_ancestors_async"
+get_disorder_ancestors_async.__doc__ = _ASYNC_DOC_TEMPLATE.format(name="get_disorder_ancestors")
+
+get_disorder_parents_async = _generate_async_route("parents")
+get_disorder_parents_async.__name__ = "get_disorder_parents_async"
+get_disorder_parents_async.__doc__ = _ASYNC_DOC_TEMPLATE.format(name="get_disorder_parents")
+
+get_disorder_children_async = _generate_async_route("children")
+get_disorder_children_async.__name__ = "get_disorder_children_async"
+get_disorder_children_async.__doc__ = _ASYNC_DOC_TEMPLATE.format(name="get_disorder_children")
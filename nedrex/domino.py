@@ -7,9 +7,10 @@ active network modules.
 from typing import List as _List
 
 from nedrex import config as _config
+from nedrex._common import auth_headers as _auth_headers
 from nedrex._common import check_response as _check_response
 from nedrex._common import check_status_factory as _check_status_factory
-from nedrex._common import http as _http
+from nedrex._common import post_json as _post_json
 
 
 def domino_submit(seeds: _List[str], network: str = "DEFAULT") -> str:
@@ -32,7 +33,7 @@ def domino_submit(seeds: _List[str], network: str = "DEFAULT") -> str:
     url = f"{_config.url_base}/domino/submit"
     body = {"seeds": seeds, "network": network}
 
-    resp = _http.post(url, json=body, headers={"x-api-key": _config.api_key})
+    resp = _post_json(url, body, headers=_auth_headers())
     result: str = _check_response(resp)
     return result
 
@@ -1,23 +1,44 @@
+# -*- coding: utf-8 -*-
+"""Functions to access the graph builder routes in a NeDRex API instance
+"""
+
 from pathlib import Path as _Path
 from typing import Any as _Any
 from typing import Dict as _Dict
-from typing import List as _List
 from typing import Optional as _Optional
+from typing import Sequence as _Sequence
 
 from nedrex import config as _config
+from nedrex._common import auth_headers as _auth_headers
 from nedrex._common import check_response as _check_response
 from nedrex._common import download_file as _download_file
 from nedrex._common import http as _http
+from nedrex._common import post_json as _post_json
+
+__all__ = ["build_request", "check_build_status", "download_graph"]
+
+_DEFAULT_NODES = ("disorder", "drug", "gene", "protein")
+_DEFAULT_EDGES = (
+    "disorder_is_subtype_of_disorder",
+    "drug_has_indication",
+    "drug_has_target",
+    "gene_associated_with_disorder",
+    "protein_encoded_by_gene",
+    "protein_interacts_with_protein",
+)
+_DEFAULT_PPI_EVIDENCE = ("exp",)
+_DEFAULT_TAXID = (9606,)
+_DEFAULT_DRUG_GROUPS = ("approved",)
 
 
 # pylint: disable=R0913
 def build_request(
-    nodes: _Optional[_List[str]] = None,
-    edges: _Optional[_List[str]] = None,
-    ppi_evidence: _Optional[_List[str]] = None,
+    nodes: _Optional[_Sequence[str]] = None,
+    edges: _Optional[_Sequence[str]] = None,
+    ppi_evidence: _Optional[_Sequence[str]] = None,
     include_ppi_self_loops: bool = False,
-    taxid: _Optional[_List[int]] = None,
-    drug_groups: _Optional[_List[str]] = None,
+    taxid: _Optional[_Sequence[int]] = None,
+    drug_groups: _Optional[_Sequence[str]] = None,
     concise: bool = True,
     include_omim: bool = True,
     disgenet_threshold: float = 0.0,
@@ -88,22 +109,15 @@ def build_request(
     """
 
     if nodes is None:
-        nodes = ["disorder", "drug", "gene", "protein"]
+        nodes = _DEFAULT_NODES
     if edges is None:
-        edges = [
-            "disorder_is_subtype_of_disorder",
-            "drug_has_indication",
-            "drug_has_target",
-            "gene_associated_with_disorder",
-            "protein_encoded_by_gene",
-            "protein_interacts_with_protein",
-        ]
+        edges = _DEFAULT_EDGES
     if ppi_evidence is None:
-        ppi_evidence = ["exp"]
+        ppi_evidence = _DEFAULT_PPI_EVIDENCE
     if taxid is None:
-        taxid = [9606]
+        taxid = _DEFAULT_TAXID
     if drug_groups is None:
-        drug_groups = ["approved"]
+        drug_groups = _DEFAULT_DRUG_GROUPS
 
     body = {
         "nodes": nodes,
@@ -120,7 +134,7 @@ def build_request(
     }
 
     url = f"{_config.url_base}/graph/builder"
-    resp = _http.post(url, json=body, headers={"x-api-key": _config.api_key})
+    resp = _post_json(url, body, headers=_auth_headers())
     result: str = _check_response(resp)
     return result
 
@@ -143,7 +157,7 @@ def check_build_status(uid: str) -> _Dict[str, _Any]:
         status of the job is stored using the `status` key
     """
     url = f"{_config.url_base}/graph/details/{uid}"
-    resp = _http.get(url, headers={"x-api-key": _config.api_key})
+    resp = _http.get(url, headers=_auth_headers())
     result: _Dict[str, _Any] = _check_response(resp)
     return result
 
@@ -169,5 +183,5 @@ def download_graph(uid: str, target: _Optional[str] = None) -> str:
 
     url = f"{_config.url_base}/graph/download/{uid}/{uid}.graphml"
 
-    _download_file(url, target)
+    _download_file(url, target, pipelined=True)
     return target
@@ -1,9 +1,10 @@
 from typing import List as _List
 
 from nedrex import config as _config
+from nedrex._common import auth_headers as _auth_headers
 from nedrex._common import check_response as _check_response
 from nedrex._common import check_status_factory as _check_status_factory
-from nedrex._common import http as _http
+from nedrex._common import post_json as _post_json
 
 
 def kpm_submit(seeds: _List[str], k: int, network: str = "DEFAULT") -> str:
@@ -28,7 +29,7 @@ def kpm_submit(seeds: _List[str], k: int, network: str = "DEFAULT") -> str:
     url = f"{_config.url_base}/kpm/submit"
     body = {"seeds": seeds, "k": k, "network": network}
 
-    resp = _http.post(url, json=body, headers={"x-api-key": _config.api_key})
+    resp = _post_json(url, body, headers=_auth_headers())
     result: str = _check_response(resp)
     return result
 
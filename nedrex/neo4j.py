@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
-"""Module containing a function providing access to Neo4j NeDRex
+"""Module containing functions providing access to Neo4j NeDRex
 """
 
-import json as _json
 from typing import Any as _Any
+from typing import AsyncGenerator as _AsyncGenerator
 from typing import Dict as _Dict
 from typing import Generator as _Generator
 from typing import List as _List
@@ -11,7 +11,11 @@ from typing import List as _List
 from requests.exceptions import ChunkedEncodingError  # type: ignore
 
 from nedrex import config as _config
+from nedrex._common import async_auth_headers as _async_auth_headers
+from nedrex._common import async_client as _async_client
+from nedrex._common import auth_headers as _auth_headers
 from nedrex._common import http as _http
+from nedrex._common import loads_json as _loads_json
 from nedrex.exceptions import NeDRexError
 
 
@@ -31,14 +35,52 @@ def neo4j_query(query: str) -> _Generator[_List[_Dict[str, _Any]], None, None]:
     url = f"{_config.url_base}/neo4j/query"
     params = {"query": query}
 
-    resp = _http.get(url, params=params, headers={"x-api-key": _config.api_key}, stream=True)
+    resp = _http.get(url, params=params, headers=_auth_headers(), stream=True)
     if resp.status_code != 200:
         raise NeDRexError("Querying Neo4j returned a non-200 status code.")
 
     try:
-        for line in resp.iter_lines():
-            data = _json.loads(line.decode())
-            yield from data
+        for line in resp.iter_lines(chunk_size=1 << 16):
+            if not line:
+                continue
+            yield from _loads_json(line)
 
     except ChunkedEncodingError as exc:
         raise NeDRexError("cypher query could not be executed") from exc
+
+
+async def neo4j_query_async(query: str) -> _AsyncGenerator[_List[_Dict[str, _Any]], None]:
+    """Run a cypher query on a Neo4j NeDRex instance, streaming results asynchronously
+
+    This allows several queries to be run concurrently (e.g., with
+    `asyncio.gather`). It requires the optional httpx dependency.
+
+    Parameters
+    ----------
+    query : str
+        A valid cypher query
+
+    Yields
+    ------
+    list[dict[str, Any]]
+        An individual result from the cypher query.
+    """
+    import httpx  # type: ignore  # pylint: disable=import-outside-toplevel
+
+    url = f"{_config.url_base}/neo4j/query"
+    params = {"query": query}
+
+    async with _async_client() as client:
+        async with client.stream("GET", url, params=params, headers=_async_auth_headers()) as resp:
+            if resp.status_code != 200:
+                raise NeDRexError("Querying Neo4j returned a non-200 status code.")
+
+            try:
+                async for line in resp.aiter_lines():
+                    if not line:
+                        continue
+                    for item in _loads_json(line):
+                        yield item
+
+            except httpx.RemoteProtocolError as exc:
+                raise NeDRexError("cypher query could not be executed") from exc
@@ -1,19 +1,34 @@
 # -*- coding: utf-8 -*-
-"""Module containing a function to access PPI routes in a NeDRex instance
+"""Module containing functions to access PPI routes in a NeDRex instance
 """
+import asyncio as _asyncio
 from typing import Any as _Any
+from typing import AsyncGenerator as _AsyncGenerator
 from typing import Dict as _Dict
 from typing import Iterable as _Iterable
 from typing import List as _List
 from typing import Optional as _Optional
 
 from nedrex import config as _config
+from nedrex._common import async_auth_headers as _async_auth_headers
+from nedrex._common import async_client as _async_client
+from nedrex._common import auth_headers as _auth_headers
 from nedrex._common import check_pagination_limit as _check_pagination_limit
 from nedrex._common import check_response as _check_response
 from nedrex._common import get_pagination_limit as _get_pagination_limit
 from nedrex._common import http as _http
 from nedrex.exceptions import NeDRexError
 
+_ALLOWED_EVIDENCE = frozenset({"exp", "pred", "ortho"})
+
+
+def _check_evidence(evidence: _Iterable[str]) -> _List[str]:
+    evidence = list(evidence)
+    extra_evidence = {item for item in evidence if item not in _ALLOWED_EVIDENCE}
+    if extra_evidence:
+        raise NeDRexError(f"unexpected evidence types: {extra_evidence}")
+    return sorted(set(evidence))
+
 
 def ppis(evidence: _Iterable[str], skip: int = 0, limit: _Optional[int] = None) -> _List[_Dict[str, _Any]]:
     """Obtain PPIs from a NeDRex instance
@@ -36,16 +51,74 @@ def ppis(evidence: _Iterable[str], skip: int = 0, limit: _Optional[int] = None)
     list[dict[str, Any]]
         A list of PPI edges returned from the NeDRexAPI.
     """
-    evidence_set = set(evidence)
-    extra_evidence = evidence_set - {"exp", "pred", "ortho"}
-    if extra_evidence:
-        raise NeDRexError(f"unexpected evidence types: {extra_evidence}")
+    evidence_list = _check_evidence(evidence)
 
     maximum_limit = _get_pagination_limit()
     _check_pagination_limit(limit, maximum_limit)
 
-    params = {"iid_evidence": list(evidence_set), "skip": skip, "limit": limit}
+    params = {"iid_evidence": evidence_list, "skip": skip, "limit": limit}
 
-    resp = _http.get(f"{_config.url_base}/ppi", params=params, headers={"x-api-key": _config.api_key})
+    resp = _http.get(f"{_config.url_base}/ppi", params=params, headers=_auth_headers())
     result: _List[_Dict[str, _Any]] = _check_response(resp)
     return result
+
+
+async def iter_ppis_async(
+    evidence: _Iterable[str], page_size: _Optional[int] = None, max_concurrency: int = 64
+) -> _AsyncGenerator[_Dict[str, _Any], None]:
+    """Iterate over all PPIs in a NeDRex instance, fetching pages concurrently
+
+    Pages are requested in concurrent waves, which start with a single page
+    and double in size up to `max_concurrency` pages, so small result sets do
+    not request many empty pages. This requires the optional httpx
+    dependency.
+
+    Parameters
+    ----------
+    evidence : iterable[str]
+        A list of evidence types with which to filter PPIs. Valid values
+        are "exp" (experimental), "pred" (predicted), and "ortho"
+        (orthologous).
+    page_size : int, optional
+        The number of records to request per page. The default value, None,
+        uses the maximum pagination limit for the NeDRex instance being
+        queried.
+    max_concurrency : int, optional
+        The maximum number of pages to request at once. The default is 64.
+
+    Yields
+    ------
+    dict[str, Any]
+        A PPI edge returned from the NeDRex API, in the same order as
+        paging through `ppis` would give.
+    """
+    evidence_list = _check_evidence(evidence)
+
+    maximum_limit = await _asyncio.get_running_loop().run_in_executor(None, _get_pagination_limit)
+    _check_pagination_limit(page_size, maximum_limit)
+    limit: int = page_size or maximum_limit
+
+    url = f"{_config.url_base}/ppi"
+
+    headers = _async_auth_headers()
+
+    async with _async_client() as client:
+
+        async def fetch_page(skip: int) -> _List[_Dict[str, _Any]]:
+            params = {"iid_evidence": evidence_list, "skip": skip, "limit": limit}
+            resp = await client.get(url, params=params, headers=headers)
+            page: _List[_Dict[str, _Any]] = _check_response(resp)
+            return page
+
+        skip = 0
+        wave_size = 1
+        while True:
+            pages = await _asyncio.gather(*(fetch_page(skip + i * limit) for i in range(wave_size)))
+            for page in pages:
+                for item in page:
+                    yield item
+                if len(page) < limit:
+                    return
+
+            skip += wave_size * limit
+            wave_size = min(wave_size * 2, max_concurrency)
@@ -1,11 +1,27 @@
 from typing import Dict as _Dict
 from typing import Iterable as _Iterable
 from typing import List as _List
+from typing import Tuple as _Tuple
+from typing import TypeVar as _TypeVar
 from typing import Union as _Union
 
 from nedrex import config as _config
+from nedrex._common import auth_headers as _auth_headers
 from nedrex._common import check_response as _check_response
-from nedrex._common import http as _http
+from nedrex._common import post_json as _post_json
+
+_T = _TypeVar("_T")
+
+
+def _check_items(items: _Iterable[_T], types: _Union[type, _Tuple[type, ...]], message: str) -> _List[_T]:
+    items = list(items)
+    if not all(isinstance(item, types) for item in items):
+        raise ValueError(message)
+    return items
+
+
+def _add_prefix(ids: _Iterable[str], prefix: str) -> _List[str]:
+    return list(dict.fromkeys(i if i.startswith(prefix) else f"{prefix}{i}" for i in ids))
 
 
 def get_encoded_proteins(gene_list: _Iterable[_Union[int, str]]) -> _Dict[str, _List[str]]:
@@ -27,21 +43,11 @@ def get_encoded_proteins(gene_list: _Iterable[_Union[int, str]]) -> _Dict[str, _
         resultant dictionary, and they *do not* have the `entrez.` prefix.
         Additionally, the protein IDs *do not* have the `uniprot.` prefix.
     """
-    genes = []
-    for gene in gene_list:
-        if isinstance(gene, int):
-            gene = str(gene)
-        if not isinstance(gene, str):
-            raise ValueError("items in gene_list must be int or str")
-
-        gene = gene.lower()
-        if not gene.startswith("entrez."):
-            genes.append(f"entrez.{gene}")
-        else:
-            genes.append(gene)
+    gene_list = _check_items(gene_list, (int, str), "items in gene_list must be int or str")
+    genes = _add_prefix([str(gene).lower() for gene in gene_list], "entrez.")
 
     url = f"{_config.url_base}/relations/get_encoded_proteins"
-    resp = _http.post(url, json={"nodes": genes}, headers={"x-api-key": _config.api_key})
+    resp = _post_json(url, {"nodes": genes}, headers=_auth_headers())
     result: _Dict[str, _List[str]] = _check_response(resp)
     return result
 
@@ -64,18 +70,11 @@ def get_drugs_indicated_for_disorders(disorder_list: _Iterable[str]) -> _Dict[st
         *do not* have the `mondo.` prefix. Additionally, drug IDs *do not*
         have a `drugbank.` prefix.
     """
-    disorders = []
-    for disorder in disorder_list:
-        if not isinstance(disorder, str):
-            raise ValueError("items in disorder_list must be str")
-
-        if disorder.startswith("mondo."):
-            disorders.append(disorder)
-        else:
-            disorders.append(f"mondo.{disorder}")
+    disorder_list = _check_items(disorder_list, str, "items in disorder_list must be str")
+    disorders = _add_prefix(disorder_list, "mondo.")
 
     url = f"{_config.url_base}/relations/get_drugs_indicated_for_disorders"
-    resp = _http.post(url, json={"nodes": disorders}, headers={"x-api-key": _config.api_key})
+    resp = _post_json(url, {"nodes": disorders}, headers=_auth_headers())
     result: _Dict[str, _List[str]] = _check_response(resp)
     return result
 
@@ -98,18 +97,11 @@ def get_drugs_targeting_proteins(protein_list: _Iterable[str]) -> _Dict[str, _Li
         dictionary *do not* have the `uniprot.` prefix. Additionally, drug
         IDs do not have a `drugbank.` prefix.
     """
-    proteins = []
-    for protein in protein_list:
-        if not isinstance(protein, str):
-            raise ValueError("items in protein_list must be str")
-
-        if protein.startswith("uniprot."):
-            proteins.append(protein)
-        else:
-            proteins.append(f"uniprot.{protein}")
+    protein_list = _check_items(protein_list, str, "items in protein_list must be str")
+    proteins = _add_prefix(protein_list, "uniprot.")
 
     url = f"{_config.url_base}/relations/get_drugs_targeting_proteins"
-    resp = _http.post(url, json={"nodes": proteins}, headers={"x-api-key": _config.api_key})
+    resp = _post_json(url, {"nodes": proteins}, headers=_auth_headers())
     result: _Dict[str, _List[str]] = _check_response(resp)
     return result
 
@@ -133,20 +125,10 @@ def get_drugs_targeting_gene_products(gene_list: _Iterable[_Union[int, str]]) ->
         *do not* have the `entrez.` prefix. Additionally, drug IDs do not
         have a `drugbank.` prefix.
     """
-    genes = []
-    for gene in gene_list:
-        if isinstance(gene, int):
-            gene = str(gene)
-        if not isinstance(gene, str):
-            raise ValueError("items in gene_list must be int or str")
-
-        gene = gene.lower()
-        if not gene.startswith("entrez."):
-            genes.append(f"entrez.{gene}")
-        else:
-            genes.append(gene)
+    gene_list = _check_items(gene_list, (int, str), "items in gene_list must be int or str")
+    genes = _add_prefix([str(gene).lower() for gene in gene_list], "entrez.")
 
     url = f"{_config.url_base}/relations/get_drugs_targeting_gene_products"
-    resp = _http.post(url, json={"nodes": genes}, headers={"x-api-key": _config.api_key})
+    resp = _post_json(url, {"nodes": genes}, headers=_auth_headers())
     result: _Dict[str, _List[str]] = _check_response(resp)
     return result
@@ -8,9 +8,11 @@ module mining via enumeration of diverse prise-collecting Steiner trees.
 from typing import List as _List
 
 from nedrex import config as _config
+from nedrex._common import auth_headers as _auth_headers
 from nedrex._common import check_response as _check_response
 from nedrex._common import check_status_factory as _check_status_factory
 from nedrex._common import http as _http
+from nedrex._common import post_json as _post_json
 
 __all__ = ["robust_submit", "check_robust_status", "download_robust_results"]
 
@@ -58,7 +60,7 @@ def robust_submit(
     }
     url = f"{_config.url_base}/robust/submit"
 
-    resp = _http.post(url, json=body, headers={"x-api-key": _config.api_key})
+    resp = _post_json(url, body, headers=_auth_headers())
     result: str = _check_response(resp)
     return result
 
@@ -96,8 +98,8 @@ def download_robust_results(uid: str) -> str:
         A string containing the ROBUST analysis results
     """
     url = f"{_config.url_base}/robust/results"
-    params = {"uid": uid}
+    params = (("uid", uid),)
 
-    resp = _http.get(url, params=params, headers={"x-api-key": _config.api_key})
+    resp = _http.get(url, params=params, headers=_auth_headers())
     result: str = _check_response(resp, return_type="text")
     return result
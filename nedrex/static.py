@@ -2,36 +2,63 @@
 """Code to access static data in the NeDRex API
 """
 
+import copy as _copy
+import threading as _threading
 from typing import Any as _Any
 from typing import Dict as _Dict
 from typing import Optional as _Optional
 
+import cachetools as _cachetools
+from cachetools.keys import hashkey as _hashkey
+
 from nedrex import config as _config
+from nedrex._common import auth_headers as _auth_headers
 from nedrex._common import check_response as _check_response
 from nedrex._common import download_file as _download_file
 from nedrex._common import http as _http
 
+_METADATA_CACHE: "_cachetools.TTLCache[_Any, _Dict[str, _Any]]" = _cachetools.TTLCache(maxsize=8, ttl=3600)
+_LICENSE_CACHE: "_cachetools.LRUCache[_Any, str]" = _cachetools.LRUCache(maxsize=8)
+_CACHE_LOCK = _threading.Lock()
+
+
+def invalidate_static_cache() -> None:
+    """Clears the cached metadata and license, so that they are fetched again"""
+    with _CACHE_LOCK:
+        _METADATA_CACHE.clear()
+        _LICENSE_CACHE.clear()
+
+
+@_cachetools.cached(_METADATA_CACHE, key=lambda: _hashkey(_config.url_base), lock=_CACHE_LOCK)
+def _get_metadata() -> _Dict[str, _Any]:
+    url = f"{_config.url_base}/static/metadata"
+    resp = _http.get(url, headers=_auth_headers())
+    result: _Dict[str, _Any] = _check_response(resp)
+    return result
+
 
 def get_metadata() -> _Dict[str, _Any]:
     """Obtains metadata from NeDRexDB
 
     The metadata contains the versions (or dates obtained) of the individual
-    source databases integrated into NeDRexDB.
+    source databases integrated into NeDRexDB. The result is cached for an
+    hour (see `invalidate_static_cache`).
 
     Returns
     -------
     dict[str, Any]
         The metadata for the NeDRexDB instance behind the API
     """
-    url = f"{_config.url_base}/static/metadata"
-    resp = _http.get(url, headers={"x-api-key": _config.api_key})
-    result: _Dict[str, _Any] = _check_response(resp)
-    return result
+    return _copy.deepcopy(_get_metadata())
 
 
+@_cachetools.cached(_LICENSE_CACHE, key=lambda: _hashkey(_config.url_base), lock=_CACHE_LOCK)
 def get_license() -> str:
     """Obtain the NeDRex license
 
+    The license is cached after it is first obtained (see
+    `invalidate_static_cache`).
+
     Returns
     -------
     str
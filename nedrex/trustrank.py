@@ -12,9 +12,11 @@ from typing import List as _List
 from typing import Optional as _Optional
 
 from nedrex import config as _config
+from nedrex._common import auth_headers as _auth_headers
 from nedrex._common import check_response as _check_response
 from nedrex._common import check_status_factory as _check_status_factory
 from nedrex._common import http as _http
+from nedrex._common import post_json as _post_json
 
 __all__ = ["trustrank_submit", "check_trustrank_status", "download_trustrank_results"]
 
@@ -61,7 +63,7 @@ def trustrank_submit(
         "N": n,
     }
 
-    resp = _http.post(url, json=body, headers={"x-api-key": _config.api_key})
+    resp = _post_json(url, body, headers=_auth_headers())
     result: str = _check_response(resp)
     return result
 
@@ -97,8 +99,8 @@ def download_trustrank_results(uid: str) -> str:
         A string containing the TrustRank analysis results
     """
     url = f"{_config.url_base}/trustrank/download"
-    params = {"uid": uid}
+    params = (("uid", uid),)
 
-    resp = _http.get(url, params=params, headers={"x-api-key": _config.api_key})
+    resp = _http.get(url, params=params, headers=_auth_headers())
     result: str = _check_response(resp, return_type="text")
     return result
@@ -5,9 +5,10 @@
 from typing import List as _List
 
 from nedrex import config as _config
+from nedrex._common import auth_headers as _auth_headers
 from nedrex._common import check_response as _check_response
 from nedrex._common import check_status_factory as _check_status_factory
-from nedrex._common import http as _http
+from nedrex._common import post_json as _post_json
 
 __all__ = ["joint_validation_submit", "module_validation_submit", "drug_validation_submit", "check_validation_status"]
 
@@ -88,7 +89,7 @@ def joint_validation_submit(
         "permutations": permutations,
         "only_approved_drugs": only_approved_drugs,
     }
-    resp = _http.post(url, json=body, headers={"x-api-key": _config.api_key})
+    resp = _post_json(url, body, headers=_auth_headers())
     result: str = _check_response(resp)
     return result
 
@@ -134,7 +135,7 @@ def module_validation_submit(
         "permutations": permutations,
         "only_approved_drugs": only_approved_drugs,
     }
-    resp = _http.post(url, json=body, headers={"x-api-key": _config.api_key})
+    resp = _post_json(url, body, headers=_auth_headers())
     result: str = _check_response(resp)
     return result
 
@@ -170,6 +171,6 @@ def drug_validation_submit(
         "only_approved_drugs": only_approved_drugs,
     }
 
-    resp = _http.post(url, json=body, headers={"x-api-key": _config.api_key})
+    resp = _post_json(url, body, headers=_auth_headers())
     result: str = _check_response(resp)
     return result
@@ -5,6 +5,7 @@ from typing import List as _List
 from typing import Optional as _Optional
 
 from nedrex import config as _config
+from nedrex._common import auth_headers as _auth_headers
 from nedrex._common import check_pagination_limit as _check_pagination_limit
 from nedrex._common import check_response as _check_response
 from nedrex._common import get_pagination_limit as _get_pagination_limit
@@ -21,7 +22,7 @@ def get_effect_choices() -> _List[str]:
         variant-disorder associations.
     """
     url = f"{_config.url_base}/variants/get_effect_choices"
-    resp = _http.get(url, headers={"x-api-key": _config.api_key})
+    resp = _http.get(url, headers=_auth_headers())
     result: _List[str] = _check_response(resp)
     return result
 
@@ -36,7 +37,7 @@ def get_review_status_choices() -> _List[str]:
         variant-disorder associations.
     """
     url = f"{_config.url_base}/variants/get_review_choices"
-    resp = _http.get(url, headers={"x-api-key": _config.api_key})
+    resp = _http.get(url, headers=_auth_headers())
     result: _List[str] = _check_response(resp)
     return result
 
@@ -96,7 +97,7 @@ def get_variant_disorder_associations(
     }
 
     url = f"{_config.url_base}/variants/get_variant_disorder_associations"
-    resp = _http.get(url, params=params, headers={"x-api-key": _config.api_key})
+    resp = _http.get(url, params=params, headers=_auth_headers())
     result: _List[_Dict[str, _Any]] = _check_response(resp)
     return result
 
@@ -194,7 +195,7 @@ def get_variant_gene_associations(
     params = {"variant_id": variant_ids, "gene_id": gene_ids, "offset": offset, "limit": limit}
 
     url = f"{_config.url_base}/variants/get_variant_gene_associations"
-    resp = _http.get(url, params=params, headers={"x-api-key": _config.api_key})
+    resp = _http.get(url, params=params, headers=_auth_headers())
     result: _List[_Dict[str, _Any]] = _check_response(resp)
     return result
 
@@ -262,7 +263,7 @@ def get_variant_based_disorder_associated_genes(
 
     url = f"{_config.url_base}/variants/variant_based_disorder_associated_genes"
 
-    resp = _http.get(url, params=params, headers={"x-api-key": _config.api_key})
+    resp = _http.get(url, params=params, headers=_auth_headers())
     result: _List[str] = _check_response(resp)
     return result
 
@@ -294,6 +295,6 @@ def get_variant_based_gene_associated_disorders(
 
     url = f"{_config.url_base}/variants/variant_based_gene_associated_disorders"
 
-    resp = _http.get(url, params=params, headers={"x-api-key": _config.api_key})
+    resp = _http.get(url, params=params, headers=_auth_headers())
     result: _List[str] = _check_response(resp)
     return result
@@ -3,6 +3,7 @@ from typing import Optional as _Optional
 
 from nedrex import config as _config
 from nedrex._common import http as _http
+from nedrex._common import stream_to_file as _stream_to_file
 from nedrex._decorators import check_url_vpd as _check_url_vpd
 
 
@@ -29,10 +30,8 @@ def get_vpd(disorder: str, number_of_patients: int, out_dir: str) -> _Optional[s
     url: str = f"{_config.url_vpd}/vpd/{disorder}/{archive_name}"
     archive: str = _os.path.join(out_dir, archive_name)
 
-    data = _http.get(url)
-    if data.status_code != 200:
-        return None
-
-    with open(archive, "wb") as arch:
-        arch.write(data.content)
+    with _http.get(url, stream=True) as data:
+        if data.status_code != 200:
+            return None
+        _stream_to_file(data, archive)
     return archive
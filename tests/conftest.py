@@ -0,0 +1,228 @@
+"""Shared configuration and fixtures for the `nedrex` tests.
+
+The tests are independent and network-bound, so they are intended to be run in
+parallel with pytest-xdist, e.g., ``pytest -n auto --dist=loadgroup``.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import lru_cache
+
+import pytest
+import requests
+
+import nedrex
+from nedrex._common import close_session, http
+from nedrex.core import api_keys_active, get_collection_attributes, get_edge_types, get_node_ids, get_node_types
+
+
+API_URL = "https://api.nedrex.net/licensed/"
+_REQUESTS_CACHE_KEY = pytest.StashKey()
+
+
+# Polled job statuses, streamed node ID lists, job submissions and API key generation are never served from the requests
+# cache.
+_UNCACHED_URLS = (
+    "*/status?*",
+    "*_build_status?*",
+    "*/graph/details/*",
+    "*/attributes/primaryDomainId/json",
+    "*/submit*",
+    "*/graph/builder",
+    "*/admin/api_key/generate",
+)
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("nedrex")
+    group.addoption(
+        "--use-requests-cache",
+        action="store_true",
+        help="Reuse API responses from an on-disk cache between test runs (requires requests-cache).",
+    )
+    group.addoption(
+        "--requests-cache-hours",
+        type=float,
+        default=12.0,
+        help="How long cached API responses are reused for, in hours (default: 12).",
+    )
+
+
+def pytest_configure(config):
+    # Keep test runs from writing to the user's on-disk cache.
+    nedrex.config.set_disk_cache(False)
+
+    # Set up here so that requests made while collecting tests are cached too.
+    if not config.getoption("use_requests_cache"):
+        return
+
+    try:
+        import requests_cache
+    except ImportError as exc:
+        raise pytest.UsageError("--use-requests-cache requires the requests-cache package") from exc
+
+    cache_dir = config.cache.mkdir("nedrex-requests") if config.cache is not None else config.rootpath / ".cache"
+    # WAL mode, as pytest-xdist workers share the SQLite file.
+    cached = requests_cache.CachedSession(
+        cache_name=str(cache_dir / "responses"),
+        backend="sqlite",
+        wal=True,
+        expire_after=timedelta(hours=config.getoption("requests_cache_hours")),
+        allowable_methods=("GET", "POST"),
+        urls_expire_after={url: requests_cache.DO_NOT_CACHE for url in _UNCACHED_URLS},
+    )
+    # Route nedrex's session through the cache, keeping its retrying adapters.
+    for prefix, adapter in http.adapters.items():
+        cached.mount(prefix, adapter)
+    http.send = cached.send
+    config.stash[_REQUESTS_CACHE_KEY] = cached
+
+
+def pytest_unconfigure(config):
+    nedrex.config.set_disk_cache(True)
+    _generate_api_key.cache_clear()
+    _get_collections.cache_clear()
+
+    cached = config.stash.get(_REQUESTS_CACHE_KEY, None)
+    if cached is not None:
+        del http.send
+        cached.close()
+    close_session()
+
+
+@lru_cache(maxsize=1)
+def _generate_api_key():
+    if os.environ.get("NEDREX_API_KEY"):
+        return os.environ["NEDREX_API_KEY"]
+    try:
+        resp = http.post(f"{API_URL}admin/api_key/generate", json={"accept_eula": True})
+    except requests.ConnectionError:
+        return None
+    return resp.json()
+
+
+def get_api_key():
+    key = _generate_api_key()
+    if key is None:
+        pytest.skip("NeDRex API is unreachable", allow_module_level=True)
+    return key
+
+
+# These restore the previous value on exit, so that fixtures of different scopes can nest.
+@contextmanager
+def url_base():
+    previous = nedrex.config._url_base
+    nedrex.config.set_url_base(API_URL)
+    try:
+        yield
+    finally:
+        nedrex.config._url_base = previous
+
+
+@contextmanager
+def api_key():
+    previous = nedrex.config._api_key
+    nedrex.config.set_api_key(get_api_key())
+    try:
+        yield
+    finally:
+        nedrex.config._api_key = previous
+
+
+@lru_cache(maxsize=1)
+def _get_collections():
+    with api_key(), url_base():
+        return {"node": get_node_types(), "edge": get_edge_types()}
+
+
+def pytest_generate_tests(metafunc):
+    if "collection" not in metafunc.fixturenames:
+        return
+
+    for marker, kind in (("node_collections", "node"), ("edge_collections", "edge")):
+        if metafunc.definition.get_closest_marker(marker):
+            metafunc.parametrize("collection", _get_collections()[kind])
+
+
+@pytest.fixture(scope="session")
+def node_collections():
+    return _get_collections()["node"]
+
+
+@pytest.fixture(scope="session")
+def edge_collections():
+    return _get_collections()["edge"]
+
+
+@pytest.fixture(scope="session")
+def api_key_value():
+    return get_api_key()
+
+
+@pytest.fixture(scope="session")
+def nedrex_config(api_key_value):
+    with url_base(), api_key():
+        yield
+
+
+@pytest.fixture(autouse=True)
+def live_api(request):
+    # Tests marked `offline` still run when the API cannot be reached.
+    if request.node.get_closest_marker("offline") is None:
+        request.getfixturevalue("nedrex_config")
+
+
+@pytest.fixture(scope="session")
+def all_disorder_ids(nedrex_config):
+    # Excludes the root of MONDO.
+    return frozenset(get_node_ids("disorder")) - {"mondo.0000001"}
+
+
+@pytest.fixture(scope="session")
+def all_collection_attrs(nedrex_config, node_collections, edge_collections):
+    # Only the edge tests need counts. The tests using this share an xdist_group, so only one worker fetches them.
+    lookups = [(collection, False) for collection in node_collections]
+    lookups += [(collection, True) for collection in edge_collections]
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(lambda lookup: get_collection_attributes(*lookup), lookups))
+
+    attrs = {"node": {}, "edge": {}}
+    for (collection, include_counts), result in zip(lookups, results):
+        attrs["edge" if include_counts else "node"][collection] = result
+    return attrs
+
+
+@pytest.fixture(scope="session")
+def node_collection_attrs(all_collection_attrs):
+    return all_collection_attrs["node"]
+
+
+@pytest.fixture(scope="session")
+def edge_collection_attr_counts(all_collection_attrs):
+    return all_collection_attrs["edge"]
+
+
+@pytest.fixture
+def without_url_base():
+    previous = nedrex.config._url_base
+    nedrex.config._url_base = None
+    yield
+    nedrex.config._url_base = previous
+
+
+@pytest.fixture
+def without_api_key():
+    previous = nedrex.config._api_key
+    nedrex.config._api_key = None
+    yield
+    nedrex.config._api_key = previous
+
+
+@pytest.fixture(scope="session")
+def require_api_keys_active(nedrex_config):
+    if not api_keys_active():
+        pytest.skip("API keys are not active on the NeDRex instance")
+
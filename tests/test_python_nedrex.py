@@ -2,23 +2,22 @@
 
 """Tests for `nedrex` package."""
 
-import os
+import asyncio
+import json
 import re
-from pathlib import Path
 import random
-import tempfile
+import threading
 import time
-from contextlib import contextmanager
-from functools import lru_cache
-
-from more_itertools import take
+from pathlib import Path
 
 import pytest
 import requests
 
 import nedrex
-from nedrex._common import get_pagination_limit
+import nedrex._common
+from nedrex._common import auth_headers, cache_dir, clear_disk_cache, disk_cached_get, get_pagination_limit, http
 from nedrex.core import (
+    async_session,
     get_edges,
     iter_edges,
     iter_nodes,
@@ -27,13 +26,18 @@ from nedrex.core import (
     get_collection_attributes,
     get_node_ids,
     get_nodes,
-    api_keys_active,
+    get_nodes_async,
+    wait_for,
+    wait_for_async,
 )
 from nedrex.diamond import diamond_submit, check_diamond_status
 from nedrex.disorder import (
+    _CodeBatcher,
     get_disorder_ancestors,
     get_disorder_children,
+    get_disorder_children_async,
     get_disorder_descendants,
+    get_disorder_hierarchy,
     get_disorder_parents,
     search_by_icd10,
 )
@@ -49,21 +53,20 @@ from nedrex.graph import (
 )
 from nedrex.kpm import kpm_submit, check_kpm_status
 from nedrex.must import must_request, check_must_status
-from nedrex.neo4j import neo4j_query
-from nedrex.ppi import ppis
+from nedrex.neo4j import neo4j_query, neo4j_query_async
+from nedrex.ppi import iter_ppis_async, ppis
 from nedrex.relations import (
     get_encoded_proteins,
     get_drugs_indicated_for_disorders,
     get_drugs_targeting_proteins,
     get_drugs_targeting_gene_products,
 )
+from nedrex.static import get_metadata, invalidate_static_cache
 
-
-API_URL = "https://api.nedrex.net/licensed/"
-API_KEY = requests.post(f"{API_URL}admin/api_key/generate", json={"accept_eula": True}).json()
+from .conftest import API_URL
 
 
-SEEDS = [
+SEEDS = (
     "P43121",
     "P01589",
     "P30203",
@@ -106,71 +109,94 @@ SEEDS = [
     "P16871",
     "Q14765",
     "Q16552",
-]
+)
 
+N_RANDOM_DISORDERS = 20
 UID_REGEX = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
 
 
-@contextmanager
-def url_base():
-    nedrex.config.set_url_base(API_URL)
-    yield
-    nedrex.config._url_base = None
-
-
-@contextmanager
-def api_key():
-    nedrex.config.set_api_key(API_KEY)
-    yield
-    nedrex.config._api_key = None
-
-
-@lru_cache(maxsize=10)
-def get_node_collections():
-    with api_key(), url_base():
-        collections = get_node_types()
-    return collections
-
-
-@lru_cache(maxsize=10)
-def get_edge_collections():
-    with api_key(), url_base():
-        collections = get_edge_types()
-    return collections
-
-
-def get_random_disorder_selection(n, skip_root=True):
-    random.seed(20220621)
-    with api_key(), url_base():
-        disorder_ids = set(get_node_ids("disorder"))
-    disorder_ids.remove("mondo.0000001")
-    return random.sample(sorted(disorder_ids), n)
-
+def get_random_disorder_selection(disorder_ids, n):
+    return tuple(random.Random(20220621).sample(sorted(disorder_ids), n))
 
-@pytest.fixture
-def config():
-    return {"api_url": API_URL, "api_key": API_KEY}
 
-
-@pytest.fixture
-def set_api_key(config):
-    with api_key():
-        yield
-
-
-@pytest.fixture
-def set_base_url(config):
-    with url_base():
-        yield
+def test_set_api_base():
+    assert nedrex.config._url_base == API_URL.rstrip("/")
 
 
-def test_set_api_base(set_base_url):
-    assert nedrex.config._url_base == API_URL.rstrip("/")
+@pytest.mark.offline
+class TestDiskCachedGet:
+    URL = "http://nedrex.invalid/list_node_collections"
+
+    @pytest.fixture(autouse=True)
+    def api(self, monkeypatch, tmp_path):
+        # Serves ["protein"] with an ETag, or a 304 if the request carries the current ETag (or one is forced).
+        self.requests = []
+        self.etag = '"v1"'
+        self.force_not_modified = False
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        monkeypatch.setattr(nedrex.config, "_disk_cache", True)
+        monkeypatch.setattr(nedrex.config, "_api_key", "key-a")
+
+        def get(url, params=None, headers=None):
+            self.requests.append(dict(headers or {}))
+            resp = requests.Response()
+            if self.force_not_modified or headers.get("If-None-Match") == self.etag:
+                self.force_not_modified = False
+                resp.status_code = 304
+                resp._content = b""
+            else:
+                resp.status_code = 200
+                resp._content = b'["protein"]'
+                resp.headers["ETag"] = self.etag
+            return resp
+
+        monkeypatch.setattr(http, "get", get)
+        return tmp_path / "nedrex"
+
+    def test_revalidates_cached_copy(self, api):
+        assert disk_cached_get(self.URL) == ["protein"]
+        assert disk_cached_get(self.URL) == ["protein"]
+        assert "If-None-Match" not in self.requests[0]
+        assert self.requests[1]["If-None-Match"] == self.etag
+
+    def test_cached_copy_is_shared_between_api_keys(self, monkeypatch, api):
+        disk_cached_get(self.URL)
+        monkeypatch.setattr(nedrex.config, "_api_key", "key-b")
+        assert disk_cached_get(self.URL) == ["protein"]
+        assert self.requests[1]["If-None-Match"] == self.etag
+        assert self.requests[1]["x-api-key"] == "key-b"
+        assert len(list(api.iterdir())) == 1
+
+    def test_clear_disk_cache(self, api):
+        disk_cached_get(self.URL)
+        clear_disk_cache()
+        assert not list(api.iterdir())
+
+    def test_empty_xdg_cache_home_is_unset(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("XDG_CACHE_HOME", "")
+        monkeypatch.setattr(Path, "home", lambda: tmp_path)
+        assert cache_dir() == tmp_path / ".cache" / "nedrex"
+
+    def test_refetches_if_not_modified_without_cached_copy(self, api):
+        disk_cached_get(self.URL)
+        for cache_file in api.iterdir():
+            cache_file.unlink()
+        # e.g., an HTTP cache in between revalidated its own copy.
+        self.force_not_modified = True
+        assert disk_cached_get(self.URL) == ["protein"]
+        assert self.requests[-1]["Cache-Control"] == "no-cache"
+
+    def test_can_be_disabled(self, monkeypatch, api):
+        monkeypatch.setattr(nedrex.config, "_disk_cache", False)
+        assert disk_cached_get(self.URL) == ["protein"]
+        assert disk_cached_get(self.URL) == ["protein"]
+        assert not any("If-None-Match" in headers for headers in self.requests)
+        assert not api.exists()
 
 
 class TestGetNodeTypes:
     @pytest.fixture
-    def result(self, set_base_url, set_api_key):
+    def result(self):
         result = get_node_types()
         return result
 
@@ -187,7 +213,7 @@ class TestGetNodeTypes:
 
 class TestGetEdgeTypes:
     @pytest.fixture
-    def result(self, set_base_url, set_api_key):
+    def result(self):
         result = get_edge_types()
         return result
 
@@ -202,78 +228,169 @@ class TestGetEdgeTypes:
         assert "protein_encoded_by_gene" in result
 
 
+@pytest.mark.xdist_group(name="collection_attributes")
 class TestGetCollectionAttributes:
-    @pytest.mark.parametrize("collection", get_node_collections())
-    def test_get_node_collection_attributes(self, set_base_url, set_api_key, collection):
+    @pytest.mark.node_collections
+    def test_get_node_collection_attributes(self, node_collection_attrs, collection):
         expected_attributes = ("primaryDomainId", "domainIds", "type")
-        coll_attributes = get_collection_attributes(collection)
+        coll_attributes = node_collection_attrs[collection]
         assert all(attr in coll_attributes for attr in expected_attributes)
 
-    @pytest.mark.parametrize("collection", get_edge_collections())
-    def test_get_edge_collection_attributes(self, set_base_url, set_api_key, collection):
+    @pytest.mark.edge_collections
+    def test_get_edge_collection_attributes(self, edge_collection_attr_counts, collection):
         # NOTE: Exclude the protein_interacts_with_protein collection because of its size.
-        coll_attributes = get_collection_attributes(collection)
+        coll_attributes = edge_collection_attr_counts[collection]["attribute_counts"]
         assert "type" in coll_attributes
 
         assert all(attr in coll_attributes for attr in ("memberOne", "memberTwo")) or all(
             attr in coll_attributes for attr in ("sourceDomainId", "targetDomainId")
         )
 
+    def test_attributes_without_counts(self, edge_collection_attr_counts):
+        coll_attributes = get_collection_attributes("protein_encoded_by_gene")
+        assert isinstance(coll_attributes, list)
+        assert set(coll_attributes) == set(edge_collection_attr_counts["protein_encoded_by_gene"]["attribute_counts"])
+
 
 class TestGetNodeIds:
-    @pytest.mark.parametrize("collection", get_node_collections())
-    def test_get_node_ids(self, set_base_url, set_api_key, collection):
+    @pytest.mark.node_collections
+    def test_get_node_ids(self, collection):
         assert get_node_ids(collection)
 
-    @pytest.mark.parametrize("collection", get_edge_collections())
-    def test_get_node_ids_fails_for_edges(self, set_base_url, set_api_key, collection):
+    def test_get_node_ids_as_arrow(self):
+        pyarrow = pytest.importorskip("pyarrow")
+        node_ids = get_node_ids("disorder", as_="arrow")
+        assert isinstance(node_ids, pyarrow.Array)
+        assert node_ids.to_pylist() == get_node_ids("disorder")
+
+    @pytest.mark.edge_collections
+    def test_get_node_ids_fails_for_edges(self, collection):
         with pytest.raises(NeDRexError):
             get_node_ids(collection)
 
 
 class TestGetEdgeRoutes:
-    @pytest.mark.parametrize("collection", get_edge_collections())
-    def test_return_type_get_edges(self, set_base_url, set_api_key, collection):
+    @pytest.mark.edge_collections
+    def test_return_type_get_edges(self, collection):
         edges = get_edges(collection, limit=1_000)
         assert isinstance(edges, list)
 
-    @pytest.mark.parametrize("collection", get_edge_collections())
-    def test_edge_attributes(self, set_base_url, set_api_key, collection):
-        result = get_collection_attributes(collection, include_counts=True)
+    def test_get_edges_as_numpy(self):
+        numpy = pytest.importorskip("numpy")
+        edges = get_edges("protein_encoded_by_gene", limit=1_000, as_="numpy")
+        assert isinstance(edges, numpy.ndarray)
+        assert len(edges) == 1_000
+        assert edges.dtype.names == ("sourceDomainId", "targetDomainId", "type")
+
+    @pytest.mark.edge_collections
+    @pytest.mark.xdist_group(name="collection_attributes")
+    def test_edge_attributes(self, edge_collection_attr_counts, collection):
+        result = edge_collection_attr_counts[collection]
         total = result["document_count"]
         attr_counts = result["attribute_counts"]
 
         assert attr_counts["type"] == total
-        assert (
-            attr_counts.get("memberOne", 0) == attr_counts.get("memberTwo", 0) == total
-            and attr_counts.get("sourceDomainId", 0) == attr_counts.get("targetDomainId", 0) == 0
-        ) ^ (
-            attr_counts.get("memberOne", 0) == attr_counts.get("memberTwo", 0) == 0
-            and attr_counts.get("sourceDomainId", 0) == attr_counts.get("targetDomainId", 0) == total
+        # NOTE: No attribute is counted more than `total` times, so a pair summing to 2 * total means both are on every
+        # edge (and summing to 0, on none). Edges are either undirected (memberOne/memberTwo) or directed, not both.
+        members = attr_counts.get("memberOne", 0) + attr_counts.get("memberTwo", 0)
+        source_target = attr_counts.get("sourceDomainId", 0) + attr_counts.get("targetDomainId", 0)
+        assert (members == 2 * total and source_target == 0) ^ (members == 0 and source_target == 2 * total)
+
+
+@pytest.mark.offline
+def test_async_session_shares_one_client():
+    pytest.importorskip("httpx")
+
+    async def get_client():
+        async with nedrex._common.async_client() as client:
+            return client
+
+    async def use_session():
+        async with async_session() as session_client:
+            clients = await asyncio.gather(get_client(), get_client())
+        return session_client, clients, await get_client()
+
+    session_client, clients, own_client = asyncio.run(use_session())
+    assert all(client is session_client for client in clients)
+    assert session_client.is_closed
+    assert own_client is not session_client and own_client.is_closed
+
+
+@pytest.mark.offline
+class TestGetEdgesAsNumpy:
+    @pytest.fixture
+    def serve(self, monkeypatch):
+        def serve(edges, attributes=None):
+            routes = {
+                "/list_edge_collections": ["some_edge"],
+                "/some_edge/attributes": attributes,
+                "/some_edge/all": edges,
+            }
+
+            def get(url, params=None, headers=None):
+                resp = requests.Response()
+                resp.status_code = 200
+                resp._content = json.dumps(routes[url.replace("http://nedrex.invalid", "")]).encode()
+                return resp
+
+            monkeypatch.setattr(http, "get", get)
+
+        monkeypatch.setattr(nedrex.config, "_url_base", "http://nedrex.invalid")
+        monkeypatch.setattr(nedrex.config, "_disk_cache", False)
+        return serve
+
+    @pytest.mark.parametrize(
+        "attributes, fields",
+        [
+            (["memberOne", "memberTwo", "type"], ("memberOne", "memberTwo", "type")),
+            (["sourceDomainId", "targetDomainId", "type"], ("sourceDomainId", "targetDomainId", "type")),
+        ],
+    )
+    def test_without_edges(self, serve, attributes, fields):
+        numpy = pytest.importorskip("numpy")
+        serve([], attributes)
+
+        edges = get_edges("some_edge", as_="numpy")
+        assert isinstance(edges, numpy.ndarray)
+        assert len(edges) == 0
+        assert edges.dtype.names == fields
+
+    def test_non_string_fields(self, serve):
+        pytest.importorskip("numpy")
+        serve(
+            [
+                {"sourceDomainId": "drugbank.DB00001", "targetDomainId": 7, "type": "SomeEdge"},
+                {"sourceDomainId": "drugbank.DB00002", "targetDomainId": None, "type": "SomeEdge"},
+            ]
         )
 
+        edges = get_edges("some_edge", as_="numpy")
+        assert edges["sourceDomainId"].tolist() == ["drugbank.DB00001", "drugbank.DB00002"]
+        assert edges["targetDomainId"].tolist() == [7, None]
+        assert edges.dtype["sourceDomainId"].kind == "U"
+
 
 class TestGetNodeRoutes:
-    @pytest.mark.parametrize("collection", get_node_collections())
-    def test_get_all_nodes(self, set_base_url, set_api_key, collection):
+    @pytest.mark.node_collections
+    def test_get_all_nodes(self, collection):
         assert isinstance(get_nodes(collection), list)
 
-    def test_get_specific_nodes(self, set_base_url, set_api_key):
+    def test_get_specific_nodes(self):
         nodes = get_nodes("disorder", node_ids=["mondo.0000001"])
         assert isinstance(nodes, list)
         assert len(nodes) == 1
         assert nodes[0]["primaryDomainId"] == "mondo.0000001"
 
-    def test_get_drugs_with_api_key(self, set_base_url, set_api_key):
+    def test_get_drugs_with_api_key(self):
         nodes = get_nodes("drug")
         assert isinstance(nodes, list)
 
-    def test_get_specific_attributes(self, set_base_url, set_api_key):
+    def test_get_specific_attributes(self):
         nodes = get_nodes("disorder", attributes=["displayName"])
         assert isinstance(nodes, list)
         assert [set(i.keys()) == {"primaryDomainId", "displayName"} for i in nodes]
 
-    def test_get_specific_attribute_and_nodes(self, set_base_url, set_api_key):
+    def test_get_specific_attribute_and_nodes(self):
         nodes = get_nodes("disorder", attributes=["displayName"], node_ids=["mondo.0000001"])
         assert isinstance(nodes, list)
         assert len(nodes) == 1
@@ -282,28 +399,58 @@ class TestGetNodeRoutes:
             "primaryDomainId": "mondo.0000001",
         }
 
-    def test_pagination(self, set_base_url, set_api_key):
+    def test_get_nodes_as_arrow(self):
+        pyarrow = pytest.importorskip("pyarrow")
+        nodes = get_nodes("disorder", attributes=["displayName"], node_ids=["mondo.0000001"], as_="arrow")
+        assert isinstance(nodes, pyarrow.Table)
+        assert nodes.column("displayName").to_pylist() == ["disease"]
+
+    def test_get_nodes_as_pandas(self):
+        pandas = pytest.importorskip("pandas")
+        nodes = get_nodes("disorder", attributes=["displayName"], node_ids=["mondo.0000001"], as_="pandas")
+        assert isinstance(nodes, pandas.DataFrame)
+        assert nodes["displayName"].tolist() == ["disease"]
+
+    def test_get_nodes_fails_with_invalid_format(self):
+        with pytest.raises(ValueError):
+            get_nodes("disorder", as_="csv")
+
+    def test_pagination(self):
         nodes = get_nodes("genomic_variant", limit=1000, offset=1000)
         assert isinstance(nodes, list)
         assert len(nodes) == 1000
 
-    def test_consistent_pagination(self, set_base_url, set_api_key):
-        offset = 1234
-        limit = 69
+    @pytest.mark.parametrize("offset", [0, 1234, 10_000])
+    def test_consistent_pagination(self, offset):
+        # NOTE: The raw responses are compared, as identical pages should be byte-for-byte identical (and this saves
+        # decoding them). no-store keeps --use-requests-cache from serving the repeat from the cache.
+        url = f"{nedrex.config.url_base}/genomic_variant/attributes/json"
+        params = {"offset": offset, "limit": 69}
+        headers = {**auth_headers(), "Cache-Control": "no-store"}
 
-        nodes = get_nodes("genomic_variant", limit=limit, offset=offset)
+        resp = http.get(url, params=params, headers=headers)
+        resp_repeat = http.get(url, params=params, headers=headers)
+        assert resp.status_code == resp_repeat.status_code == 200
+        assert resp_repeat.content == resp.content
 
-        for _ in range(10):
-            nodes_repeat = get_nodes("genomic_variant", limit=limit, offset=offset)
-            assert nodes_repeat == nodes
+    def test_get_nodes_async_matches_get_nodes(self):
+        pytest.importorskip("httpx")
+        collections = ["disorder", "gene", "protein"]
 
+        async def fetch():
+            return await asyncio.gather(*(get_nodes_async(c, limit=100, offset=100) for c in collections))
 
+        expected = [get_nodes(c, limit=100, offset=100) for c in collections]
+        assert asyncio.run(fetch()) == expected
+
+
+@pytest.mark.xdist_group(name="TestDisorderRoutes")
 class TestDisorderRoutes:
-    def test_search_by_icd10(self, set_base_url, set_api_key):
+    def test_search_by_icd10(self):
         # NOTE: There is currently an ICD-10 mapping issue due to MONDO
         search_by_icd10("I52")
 
-    def test_get_disorder_ancestors(self, set_base_url, set_api_key):
+    def test_get_disorder_ancestors(self):
         # Check that `disease or disorder`is an ancestor of `lupus nephritis`
         # `disease or disorder` is not a parent of `lupus neprhitis`
         lupus_nephritis = "mondo.0005556"
@@ -312,7 +459,7 @@ class TestDisorderRoutes:
         result = get_disorder_ancestors(lupus_nephritis)
         assert disease_or_disorder in result[lupus_nephritis]
 
-    def test_get_disorder_descendants(self, set_base_url, set_api_key):
+    def test_get_disorder_descendants(self):
         # Check that `lupus nephritis` is a descendant of `inflammatory disease`
         # `lupus nephritis` is not a child of `inflammatory disease`
         inflam_disease = "mondo.0021166"
@@ -321,7 +468,7 @@ class TestDisorderRoutes:
         result = get_disorder_descendants(inflam_disease)
         assert lupus_nephritis in result[inflam_disease]
 
-    def test_get_disorder_parents(self, set_base_url, set_api_key):
+    def test_get_disorder_parents(self):
         # Check that `glomerulonephritis` is a parent of `lupus nephritis`
         lupus_nephritis = "mondo.0005556"
         glomerulonephritis = "mondo.0002462"
@@ -329,7 +476,7 @@ class TestDisorderRoutes:
         result = get_disorder_parents("mondo.0005556")
         assert glomerulonephritis in result[lupus_nephritis]
 
-    def test_get_disorder_children(self, set_base_url, set_api_key):
+    def test_get_disorder_children(self):
         # Check that `lupus nephritis` is a child of `glomerulonephritis`
         glomerulonephritis = "mondo.0002462"
         lupus_nephritis = "mondo.0005556"
@@ -337,52 +484,157 @@ class TestDisorderRoutes:
         result = get_disorder_children(glomerulonephritis)
         assert lupus_nephritis in result[glomerulonephritis]
 
-    @pytest.mark.parametrize("chosen_id", get_random_disorder_selection(20))
-    def test_parent_child_reciprocity(self, set_base_url, set_api_key, chosen_id):
-        parents = get_disorder_parents(chosen_id)
-        children_of_parents = get_disorder_children(parents[chosen_id])
-        assert all(chosen_id in value for value in children_of_parents.values())
+    def test_get_disorder_hierarchy(self):
+        pytest.importorskip("httpx")
+        lupus_nephritis = "mondo.0005556"
+
+        result = asyncio.run(get_disorder_hierarchy(lupus_nephritis))
+        assert set(result) == {"descendants", "ancestors", "parents", "children"}
+        assert result["parents"] == get_disorder_parents(lupus_nephritis)
+
+    def test_get_disorder_children_async(self):
+        pytest.importorskip("httpx")
+        disorder_ids = ["mondo.0002462", "mondo.0021166", "mondo.0000001"]
+
+        result = asyncio.run(get_disorder_children_async(disorder_ids, chunk_size=1))
+        assert result == get_disorder_children(disorder_ids)
+
+    @staticmethod
+    def _lookup_reciprocal(chosen_ids, lookup, reverse_lookup):
+        # NOTE: Each direction is looked up for all of the chosen IDs in one request, rather than one per test.
+        relatives = lookup(chosen_ids)
+        relatives_of_relatives = reverse_lookup(sorted({i for ids in relatives.values() for i in ids}))
+        return relatives, relatives_of_relatives
+
+    @pytest.fixture(scope="class")
+    def chosen_ids(self, all_disorder_ids):
+        return get_random_disorder_selection(all_disorder_ids, N_RANDOM_DISORDERS)
+
+    @pytest.fixture(params=range(N_RANDOM_DISORDERS))
+    def chosen_id(self, request, chosen_ids):
+        return chosen_ids[request.param]
+
+    @pytest.fixture(scope="class")
+    def parent_child_relations(self, chosen_ids):
+        return self._lookup_reciprocal(chosen_ids, get_disorder_parents, get_disorder_children)
+
+    @pytest.fixture(scope="class")
+    def ancestor_descendant_relations(self, chosen_ids):
+        return self._lookup_reciprocal(chosen_ids, get_disorder_ancestors, get_disorder_descendants)
+
+    def test_parent_child_reciprocity(self, parent_child_relations, chosen_id):
+        parents, children = parent_child_relations
+        assert all(chosen_id in children[parent] for parent in parents[chosen_id] if parent in children)
+
+    def test_ancestor_descendant_reciprocity(self, ancestor_descendant_relations, chosen_id):
+        ancestors, descendants = ancestor_descendant_relations
+        assert all(chosen_id in descendants[ancestor] for ancestor in ancestors[chosen_id] if ancestor in descendants)
 
-    @pytest.mark.parametrize("chosen_id", get_random_disorder_selection(20))
-    def test_ancestor_descendant_reciprocity(self, set_base_url, set_api_key, chosen_id):
-        parents = get_disorder_ancestors(chosen_id)
-        descendants_of_parents = get_disorder_descendants(parents[chosen_id])
-        assert all(chosen_id in value for value in descendants_of_parents.values())
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.mark.offline
+class TestCodeBatcher:
+    @pytest.fixture
+    def batcher(self, monkeypatch):
+        batcher = _CodeBatcher("/disorder/children")
+        self.release = threading.Event()
+        self.requests = []
+
+        def request(codes):
+            self.requests.append((threading.get_ident(), codes))
+            assert self.release.wait(5)
+            if "mondo.bad" in codes:
+                raise NeDRexError("bad code")
+            if "mondo.interrupt" in codes:
+                raise KeyboardInterrupt
+            return {code: [f"{code}.child"] for code in codes}
+
+        monkeypatch.setattr(batcher, "_request", request)
+        return batcher
+
+    def submit_while_in_flight(self, batcher, first, others):
+        # Holds the first lookup in flight until the others are queued behind it, so that they are sent together.
+        # Daemon threads are used so that a caller left waiting fails the test, rather than hanging it.
+        results = {}
+
+        def run(i, codes):
+            try:
+                results[i] = threading.get_ident(), batcher.submit(codes)
+            except BaseException as exc:  # pylint: disable=broad-except
+                results[i] = exc
+
+        lookups = [first, *others]
+        threads = [threading.Thread(target=run, args=(i, codes), daemon=True) for i, codes in enumerate(lookups)]
+        threads[0].start()
+        _wait_until(lambda: len(self.requests) == 1)
+        for thread in threads[1:]:
+            thread.start()
+        _wait_until(lambda: len(batcher._pending) == len(others))
+        self.release.set()
+
+        for thread in threads:
+            thread.join(timeout=5)
+        assert not any(thread.is_alive() for thread in threads), "a caller was left waiting"
+        return [results[i] for i in range(len(threads))]
+
+    def test_queued_lookups_are_sent_together(self, batcher):
+        results = self.submit_while_in_flight(batcher, ["mondo.1"], [["mondo.2"], ["mondo.3", "mondo.2"]])
+
+        assert [codes for _, codes in self.requests] == [["mondo.1"], ["mondo.2", "mondo.3", "mondo.2"]]
+        assert [result for _, result in results] == [
+            {"mondo.1": ["mondo.1.child"]},
+            {"mondo.2": ["mondo.2.child"]},
+            {"mondo.3": ["mondo.3.child"], "mondo.2": ["mondo.2.child"]},
+        ]
+
+    def test_error_only_reaches_the_caller_that_caused_it(self, batcher):
+        results = self.submit_while_in_flight(batcher, ["mondo.1"], [["mondo.2"], ["mondo.bad"]])
+
+        assert results[1][1] == {"mondo.2": ["mondo.2.child"]}
+        assert isinstance(results[2], NeDRexError)
+
+    def test_caller_stops_sending_once_its_lookup_is_done(self, batcher):
+        results = self.submit_while_in_flight(batcher, ["mondo.1"], [["mondo.2"]])
+
+        assert [ident for ident, _ in self.requests] == [ident for ident, _ in results]
+
+    def test_interrupted_send_does_not_leave_callers_waiting(self, batcher):
+        results = self.submit_while_in_flight(batcher, ["mondo.1"], [["mondo.interrupt"], ["mondo.2"]])
+
+        assert results[0][1] == {"mondo.1": ["mondo.1.child"]}
+        assert sorted(type(result).__name__ for result in results[1:]) == ["CancelledError", "KeyboardInterrupt"]
 
 
 class TestRoutesFailWithoutAPIUrl:
-    def test_get_node_type(self, set_api_key):
+    def test_get_node_type(self, without_url_base):
         with pytest.raises(ConfigError) as excinfo:
             get_node_types()
         assert "API URL is not set in the config" == str(excinfo.value)
 
-    def test_get_edge_type(self, set_api_key):
+    def test_get_edge_type(self, without_url_base):
         with pytest.raises(ConfigError) as excinfo:
             get_edge_types()
         assert "API URL is not set in the config" == str(excinfo.value)
 
 
 class TestRoutesFailWithoutAPIKey:
-    def test_get_node_type(self, set_base_url):
-        if not api_keys_active():
-            return
-
+    def test_get_node_type(self, require_api_keys_active, without_api_key):
         with pytest.raises(ConfigError) as excinfo:
             get_node_types()
         assert "no API key set in the configuration" == str(excinfo.value)
 
-        if not api_keys_active():
-            return
-
         with pytest.raises(ConfigError) as excinfo:
             get_edge_types()
         assert "no API key set in the configuration" == str(excinfo.value)
 
-    @pytest.mark.parametrize("collection", get_node_collections())
-    def test_node_routes_fail(self, set_base_url, collection):
-        if not api_keys_active():
-            return
-
+    @pytest.mark.node_collections
+    def test_node_routes_fail(self, require_api_keys_active, without_api_key, collection):
         with pytest.raises(ConfigError) as excinfo:
             get_collection_attributes(collection)
         assert "no API key set in the configuration" == str(excinfo.value)
@@ -396,15 +648,11 @@ class TestRoutesFailWithoutAPIKey:
         assert "no API key set in the configuration" == str(excinfo.value)
 
         with pytest.raises(ConfigError) as excinfo:
-            for _ in take(1, iter_nodes(collection)):
-                pass
+            next(iter_nodes(collection), None)
         assert "no API key set in the configuration" == str(excinfo.value)
 
-    @pytest.mark.parametrize("collection", get_edge_collections())
-    def test_edge_routes_fail(self, set_base_url, collection):
-        if not api_keys_active():
-            return
-
+    @pytest.mark.edge_collections
+    def test_edge_routes_fail(self, require_api_keys_active, without_api_key, collection):
         with pytest.raises(ConfigError) as excinfo:
             get_collection_attributes(collection)
         assert "no API key set in the configuration" == str(excinfo.value)
@@ -414,11 +662,10 @@ class TestRoutesFailWithoutAPIKey:
         assert "no API key set in the configuration" == str(excinfo.value)
 
         with pytest.raises(ConfigError) as excinfo:
-            for _ in take(1, iter_edges(collection)):
-                pass
+            next(iter_edges(collection), None)
         assert "no API key set in the configuration" == str(excinfo.value)
 
-    def test_disorder_routes_fail(self, set_base_url):
+    def test_disorder_routes_fail(self, without_api_key):
         disorder_id = "mondo.0000001"  # root of the MONDO tree
         icd10_id = "I59.1"  # Heart disease, unspecified
 
@@ -444,35 +691,52 @@ class TestRoutesFailWithoutAPIKey:
 
 
 class TestPPIRoute:
-    def test_ppi_route(self, set_base_url, set_api_key):
+    def test_ppi_route(self):
         ppis(["exp"], 0, get_pagination_limit())
 
-    def test_overlap_with_pagination(self, set_base_url, set_api_key):
+    @pytest.mark.parametrize("pages", [5, pytest.param(100, marks=pytest.mark.slow)])
+    def test_overlap_with_pagination(self, pages):
         page_limit = 1_000
         delta = page_limit // 2
         skip = delta
 
         previous = ppis(["exp"], 0, page_limit)
 
-        for _ in range(100):
+        for _ in range(pages):
             current = ppis(["exp"], skip, page_limit)
             assert previous[-delta:] == current[:delta]
             previous = current
             skip += delta
 
-    def test_each_evidence_type_works(self, set_base_url, set_api_key):
+    def test_iter_ppis_async_matches_ppis(self):
+        pytest.importorskip("httpx")
+
+        async def collect(n):
+            results = []
+            gen = iter_ppis_async(["exp"], page_size=1_000, max_concurrency=2)
+            async for item in gen:
+                results.append(item)
+                if len(results) == n:
+                    break
+            await gen.aclose()
+            return results
+
+        expected = ppis(["exp"], 0, 1_000) + ppis(["exp"], 1_000, 1_000)
+        assert asyncio.run(collect(2_000)) == expected
+
+    def test_each_evidence_type_works(self):
         for evidence_type in ["exp", "pred", "ortho"]:
             results = ppis([evidence_type], 0, get_pagination_limit())
             assert all(evidence_type in doc["evidenceTypes"] for doc in results)
 
-    def test_fails_with_invalid_type(self, set_base_url, set_api_key):
+    def test_fails_with_invalid_type(self):
         for evidence_type in ["exps", "pr3d", "orth"]:
             with pytest.raises(NeDRexError) as excinfo:
                 ppis([evidence_type])
             err_val = {evidence_type}
             assert str(excinfo.value) == f"unexpected evidence types: {err_val}"
 
-    def test_fails_with_large_limit(self, set_base_url, set_api_key):
+    def test_fails_with_large_limit(self):
         page_limit = get_pagination_limit()
         with pytest.raises(NeDRexError) as excinfo:
             ppis(["exp"], limit=page_limit + 1)
@@ -480,8 +744,37 @@ class TestPPIRoute:
         assert str(excinfo.value) == f"limit={page_limit + 1:,} is too great (maximum is {page_limit:,})"
 
 
+@pytest.mark.offline
+class TestStaticRoutes:
+    @pytest.fixture(autouse=True)
+    def api(self, monkeypatch):
+        self.requests = 0
+
+        def get(url, headers=None):
+            self.requests += 1
+            resp = requests.Response()
+            resp.status_code = 200
+            resp._content = b'{"version": "2.0.0", "source_databases": {"mondo": {"date": "2022-06-21"}}}'
+            return resp
+
+        monkeypatch.setattr(http, "get", get)
+        monkeypatch.setattr(nedrex.config, "_url_base", "http://nedrex.invalid")
+        invalidate_static_cache()
+        yield
+        invalidate_static_cache()
+
+    def test_metadata_is_cached(self):
+        assert get_metadata() == get_metadata()
+        assert self.requests == 1
+
+    def test_modifying_metadata_does_not_change_cache(self):
+        metadata = get_metadata()
+        metadata["source_databases"]["mondo"]["date"] = None
+        assert get_metadata()["source_databases"]["mondo"]["date"] == "2022-06-21"
+
+
 class TestRelationshipRoutes:
-    def test_get_encoded_proteins(self, set_base_url, set_api_key):
+    def test_get_encoded_proteins(self):
         # NOTE: If result changes, check these examples are still accurate.
 
         histamine_receptor_genes = ["3269", 3274, "entrez.11255"]  # HRH1, as str  # HRH2, as int  # HRH3, as prefix
@@ -492,7 +785,7 @@ class TestRelationshipRoutes:
         assert "P25021" in results["3274"]
         assert "Q9Y5N1" in results["11255"]
 
-    def test_get_drugs_indicated_for_disorders(self, set_base_url, set_api_key):
+    def test_get_drugs_indicated_for_disorders(self):
         # NOTE: If result changes, check these examples are still accurate.
 
         disorders = [
@@ -505,7 +798,7 @@ class TestRelationshipRoutes:
         assert "DB00437" in results["0005393"]  # Allopurinol for gout
         assert "DB00203" in results["0005362"]  # Sildenafil for ED
 
-    def test_get_drugs_targeting_proteins(self, set_base_url, set_api_key):
+    def test_get_drugs_targeting_proteins(self):
         # NOTE: If result changes, check these examples are still accurate.
 
         proteins = [
@@ -518,7 +811,7 @@ class TestRelationshipRoutes:
         assert "DB00341" in results["P35367"]
         assert "DB00977" in results["P03372"]
 
-    def test_get_drugs_targeting_gene_products(self, set_base_url, set_api_key):
+    def test_get_drugs_targeting_gene_products(self):
         genes = [
             "entrez.3269",  # HRH1 gene (product targetted by antihistamines)
             2099,  # Estrogen receptor α gene (product targetted by ethinylestradiol)
@@ -533,7 +826,7 @@ class TestRelationshipRoutes:
 
 
 class TestGraphRoutes:
-    def test_default_build(self, set_base_url, set_api_key):
+    def test_default_build(self):
         build_request()
 
     @pytest.mark.parametrize(
@@ -545,46 +838,109 @@ class TestGraphRoutes:
             {"taxid": ["human"]},
         ],
     )
-    def test_build_fails_with_invalid_params(self, kwargs, set_base_url, set_api_key):
+    def test_build_fails_with_invalid_params(self, kwargs):
         with pytest.raises(NeDRexError):
             build_request(**kwargs)
 
-    def test_get_uid(self, set_base_url, set_api_key):
+    def test_get_uid(self):
         uid = build_request()
-        assert UID_REGEX.match(uid)
+        assert UID_REGEX.fullmatch(uid)
         check_build_status(uid)
 
-    def test_fails_with_invalid_uid(self, set_base_url, set_api_key):
+    def test_fails_with_invalid_uid(self):
         uid = "this-is-not-a-valid-uid!"
         with pytest.raises(NeDRexError):
             check_build_status(uid)
 
-    def test_download_fails_with_invalid_uid(self, set_base_url, set_api_key):
+    def test_download_fails_with_invalid_uid(self):
         uid = "this-is-not-a-valid-uid!"
         with pytest.raises(NeDRexError):
             download_graph(uid)
 
 
+@pytest.mark.offline
+class TestWaitFor:
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        # A fake clock, advanced (and recorded) by sleeping.
+        clock = {"now": 0.0, "sleeps": []}
+
+        def sleep(delay):
+            clock["sleeps"].append(delay)
+            clock["now"] += delay
+
+        async def async_sleep(delay):
+            sleep(delay)
+
+        monkeypatch.setattr(nedrex.core._time, "monotonic", lambda: clock["now"])
+        monkeypatch.setattr(nedrex.core._time, "sleep", sleep)
+        monkeypatch.setattr(nedrex.core._asyncio, "sleep", async_sleep)
+        return clock
+
+    @staticmethod
+    def check_fn(statuses):
+        polls = iter(statuses)
+
+        def check(uid):
+            return {"uid": uid, "status": next(polls)}
+
+        return check
+
+    def test_backs_off_until_completed(self, clock):
+        check = self.check_fn(["running"] * 5 + ["completed"])
+        details = wait_for(check, "uid", initial=1.0, factor=2.0, max_interval=5.0)
+        assert details == {"uid": "uid", "status": "completed"}
+        assert clock["sleeps"] == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+    def test_returns_failed_jobs(self, clock):
+        assert wait_for(self.check_fn(["running", "failed"]), "uid")["status"] == "failed"
+
+    def test_polls_at_the_deadline_before_timing_out(self, clock):
+        check = self.check_fn(["running", "running", "completed"])
+        assert wait_for(check, "uid", initial=2.0, factor=2.0, timeout=5.0)["status"] == "completed"
+        assert clock["sleeps"] == [2.0, 3.0]
+
+        with pytest.raises(NeDRexError):
+            wait_for(self.check_fn(["running"] * 3), "uid", initial=2.0, factor=2.0, timeout=5.0)
+
+    def test_async(self, clock):
+        check = self.check_fn(["running", "running", "completed"])
+        details = asyncio.run(wait_for_async(check, "uid", initial=1.0, factor=2.0))
+        assert details["status"] == "completed"
+        assert clock["sleeps"] == [1.0, 2.0]
+
+
+@pytest.mark.xdist_group(name="TestKPMRoutes")
 class TestKPMRoutes:
-    def test_simple_request(self, set_base_url, set_api_key):
-        uid = kpm_submit(SEEDS, 10)
-        assert UID_REGEX.match(uid)
+    @pytest.fixture(scope="class")
+    def submitted_uid(self, nedrex_config):
+        return kpm_submit(SEEDS, 10)
+
+    def test_simple_request(self, submitted_uid):
+        assert UID_REGEX.fullmatch(submitted_uid)
 
-    def test_kpm_status(self, set_base_url, set_api_key):
-        uid = kpm_submit(SEEDS, 10)
-        status = check_kpm_status(uid)
+    def test_kpm_status(self, submitted_uid):
+        status = check_kpm_status(submitted_uid)
         assert isinstance(status, dict)
         assert 'status' in status.keys()
 
+    @pytest.mark.slow
+    def test_wait_for_kpm(self, submitted_uid):
+        status = wait_for(check_kpm_status, submitted_uid, initial=0.25, max_interval=10.0, timeout=600)
+        assert status["status"] in {"completed", "failed"}
 
+
+@pytest.mark.xdist_group(name="TestMustRoutes")
 class TestMustRoutes:
-    def test_simple_request(self, set_base_url, set_api_key):
-        uid = must_request(SEEDS, 0.5, True, 10, 2)
-        assert UID_REGEX.match(uid)
+    @pytest.fixture(scope="class")
+    def submitted_uid(self, nedrex_config):
+        return must_request(SEEDS, 0.5, True, 10, 2)
+
+    def test_simple_request(self, submitted_uid):
+        assert UID_REGEX.fullmatch(submitted_uid)
 
-    def test_must_status(self, set_base_url, set_api_key):
-        uid = must_request(SEEDS, 0.5, True, 10, 2)
-        status = check_must_status(uid)
+    def test_must_status(self, submitted_uid):
+        status = check_must_status(submitted_uid)
         assert isinstance(status, dict)
         assert "status" in status.keys()
 
@@ -601,7 +957,7 @@ class TestMustRoutes:
             {"maxit": None},
         ],
     )
-    def test_must_fails_with_invalid_arguments(self, set_base_url, set_api_key, update):
+    def test_must_fails_with_invalid_arguments(self, update):
         kwargs = {"seeds": SEEDS, "hubpenalty": 0.5, "multiple": True, "trees": 10, "maxit": 2, "network": "DEFAULT"}
 
         with pytest.raises(NeDRexError):
@@ -609,36 +965,42 @@ class TestMustRoutes:
             must_request(**kwargs)
 
 
+@pytest.mark.xdist_group(name="TestDiamondRoutes")
 class TestDiamondRoutes:
-    def test_simple_request(self, set_base_url, set_api_key):
-        uid = diamond_submit(SEEDS, 10)
-        assert UID_REGEX.match(uid)
+    @pytest.fixture(scope="class")
+    def submitted_uid(self, nedrex_config):
+        return diamond_submit(SEEDS, 10)
 
-    def test_diamond_status(self, set_base_url, set_api_key):
-        uid = diamond_submit(SEEDS, 10)
-        status = check_diamond_status(uid)
+    def test_simple_request(self, submitted_uid):
+        assert UID_REGEX.fullmatch(submitted_uid)
+
+    def test_diamond_status(self, submitted_uid):
+        status = check_diamond_status(submitted_uid)
         assert isinstance(status, dict)
         assert "status" in status.keys()
 
-    def test_diamond_fails_with_invalid_arguments(self, set_base_url, set_api_key):
+    def test_diamond_fails_with_invalid_arguments(self):
         with pytest.raises(ValueError):
             diamond_submit(SEEDS, n=10, edges="some")
 
 
+@pytest.mark.xdist_group(name="TestDominoRoutes")
 class TestDominoRoutes:
-    def test_simple_request(self, set_base_url, set_api_key):
-        uid = domino_submit(SEEDS)
-        assert UID_REGEX.match(uid)
+    @pytest.fixture(scope="class")
+    def submitted_uid(self, nedrex_config):
+        return domino_submit(SEEDS)
+
+    def test_simple_request(self, submitted_uid):
+        assert UID_REGEX.fullmatch(submitted_uid)
 
-    def test_check_domino_status(self, set_base_url, set_api_key):
-        uid = domino_submit(SEEDS)
-        status = check_domino_status(uid)
+    def test_check_domino_status(self, submitted_uid):
+        status = check_domino_status(submitted_uid)
         assert isinstance(status, dict)
         assert "status" in status.keys()
 
 
 class TestNeo4j:
-    def test_general_node_query(self, set_base_url, set_api_key):
+    def test_general_node_query(self):
         query = """
         MATCH (n: Gene)
         RETURN n
@@ -647,7 +1009,7 @@ class TestNeo4j:
 
         assert all(i[0]["type"] == "Gene" for i in neo4j_query(query))
 
-    def test_general_edge_query(self, set_base_url, set_api_key):
+    def test_general_edge_query(self):
         query = """
         MATCH ()-[n:GeneAssociatedWithDisorder]-()
         RETURN n
@@ -656,7 +1018,7 @@ class TestNeo4j:
 
         assert all(i[0]["type"] == "GeneAssociatedWithDisorder" for i in neo4j_query(query))
 
-    def test_general_node_query_with_attributes(self, set_base_url, set_api_key):
+    def test_general_node_query_with_attributes(self):
         query = """
         MATCH (n: Gene {approvedSymbol: 'A1BG'})
         RETURN n
@@ -667,7 +1029,7 @@ class TestNeo4j:
         assert x[0][0]['chromosome'] == '19'
 
 
-    def test_general_edge_query_with_attributes(self, set_base_url, set_api_key):
+    def test_general_edge_query_with_attributes(self):
         query = """
         MATCH ()-[n: GeneAssociatedWithDisorder {score: 1.0}]-()
         RETURN n
@@ -679,7 +1041,7 @@ class TestNeo4j:
         assert all(i[0]['score'] == 1.0 for i in results)
 
 
-    def test_gene_associated_with_disorder(self, set_base_url, set_api_key):
+    def test_gene_associated_with_disorder(self):
         query = """
         MATCH (g: Gene)-[gawd: GeneAssociatedWithDisorder]-(d: Disorder)
         RETURN g, d, gawd
@@ -691,7 +1053,19 @@ class TestNeo4j:
             assert disorder['type'] == "Disorder"
             assert assoc['type'] == "GeneAssociatedWithDisorder"
 
-    def test_write_fails(self, set_base_url, set_api_key):
+    def test_async_query_matches_sync(self):
+        pytest.importorskip("httpx")
+        query = """
+        MATCH (n: Gene {approvedSymbol: 'A1BG'})
+        RETURN n
+        """
+
+        async def collect():
+            return [i async for i in neo4j_query_async(query)]
+
+        assert asyncio.run(collect()) == list(neo4j_query(query))
+
+    def test_write_fails(self):
         query = """
         CREATE (n: SomeRandomNode)
         """